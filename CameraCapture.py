@@ -0,0 +1,151 @@
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class CameraCapture:
+    """
+    Grabs camera frames on a dedicated thread into a small preallocated ring buffer.
+    usage capture = CameraCapture(). capture.start(), then call success, image = capture.read() one time per frame.
+    read() always hands out the newest frame, frames that were overwritten before being read are counted as dropped.
+    With color_order "RGB" the capture thread converts every frame once into its ring buffer slot, so the consumer
+    gets RGB frames without converting them itself.
+    """
+
+    def __init__(self, device: int = 0, frame_width: int = 1280, frame_height: int = 720, buffer_size: int = 3,
+                 color_order: str = "BGR"):
+        """
+        Constructor for the camera capture
+        Args:
+            device: index of the camera passed to cv2.VideoCapture
+            frame_width: requested frame width
+            frame_height: requested frame height
+            buffer_size: number of frames in the ring buffer, at least 3 (writing, latest, read by consumer)
+            color_order: channel order of the frames, "BGR" as decoded by OpenCV or "RGB", e.g. for mediapipe
+        """
+        assert buffer_size >= 3
+        assert color_order in ("BGR", "RGB")
+        self.device = device
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.buffer_size = buffer_size
+        self.color_order = color_order
+        self.buffer: Optional[np.ndarray] = None
+        self._decoded: Optional[np.ndarray] = None  # BGR frame before the conversion into the buffer
+        self.cam_cap = None
+
+        self.frame_count = 0
+        self.dropped_frames = 0
+        self.is_running = False
+
+        self._latest = -1
+        self._reading = -1
+        self._read_count = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Opens the camera and starts the capture thread.
+        """
+        self.cam_cap = cv2.VideoCapture(self.device)
+        self.cam_cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
+        self.cam_cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
+        self.cam_cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P',
+                                                                     'G'))  # From https://forum.opencv.org/t/videoio-v4l2-dev-video0-select-timeout/8822/4 for linux
+        # Only keep one frame in the driver queue, the ring buffer does the rest
+        self.cam_cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run, name="CameraCapture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the capture thread and releases the camera.
+        """
+        with self._condition:
+            self.is_running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.cam_cap is not None:
+            self.cam_cap.release()
+            self.cam_cap = None
+
+    def is_opened(self) -> bool:
+        return self.is_running and self.cam_cap is not None and self.cam_cap.isOpened()
+
+    def read(self, timeout: float = 1.0) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Waits for a frame newer than the last one read and returns it.
+        The returned image is a view into the ring buffer and stays valid until the next call of read.
+        Args:
+            timeout: maximal time to wait for a new frame in seconds
+        Returns:
+                success, image
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.frame_count > self._read_count or not self.is_running, timeout)
+            if self.frame_count == self._read_count:
+                return False, None
+            self._reading = self._latest
+            self._read_count = self.frame_count
+            return True, self.buffer[self._reading]
+
+    def _next_slot(self) -> int:
+        with self._condition:
+            for slot in range(self.buffer_size):
+                if slot != self._latest and slot != self._reading:
+                    return slot
+
+    def _allocate(self, frame: np.ndarray):
+        self.buffer = np.empty((self.buffer_size,) + frame.shape, dtype=frame.dtype)
+        if self.color_order != "BGR":
+            self._decoded = np.empty_like(frame)
+
+    def _retrieve(self, target: np.ndarray) -> bool:
+        """
+        Decodes the grabbed frame into target, converted to color_order
+        """
+        if self.color_order == "BGR":
+            success, frame = self.cam_cap.retrieve(target)
+        else:
+            success, frame = self.cam_cap.retrieve(self._decoded)
+        if not success:
+            return False
+        if frame.shape != target.shape:
+            # the camera changed resolution
+            self._allocate(frame)
+            return False
+        if self.color_order == "RGB":
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=target)
+        elif not np.may_share_memory(frame, target):
+            target[...] = frame
+        return True
+
+    def _run(self):
+        while self.is_running and self.cam_cap.isOpened():
+            if not self.cam_cap.grab():
+                break
+            if self.buffer is None:
+                success, frame = self.cam_cap.retrieve()
+                if not success:
+                    continue
+                self._allocate(frame)
+            slot = self._next_slot()
+            if not self._retrieve(self.buffer[slot]):
+                continue
+
+            with self._condition:
+                if self.frame_count > self._read_count:
+                    self.dropped_frames += 1
+                self._latest = slot
+                self.frame_count += 1
+                self._condition.notify_all()
+
+        with self._condition:
+            self.is_running = False
+            self._condition.notify_all()
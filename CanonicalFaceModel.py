@@ -0,0 +1,52 @@
+"""
+Canonical face model of mediapipe (canonical_face_model.obj of the face geometry module) and the weights of its
+Procrustes landmark basis, stored as one structured array in data/canonical_face_model.npy with one row per vertex:
+    position            (3,) float64, metric position in cm
+    uv                  (2,) float64, texture coordinates
+    procrustes_weight   float64, weight of the vertex in the Procrustes fit, 0 for vertices outside the basis
+The file is memory-mapped once and shared by face_geometry and PnPHeadPose, the returned arrays are read-only.
+"""
+import functools
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "canonical_face_model.npy")
+
+
+@functools.lru_cache(maxsize=None)
+def load_model() -> np.ndarray:
+    """
+    Returns the (468,) structured array of the model
+    """
+    return np.load(MODEL_PATH, mmap_mode="r")
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@functools.lru_cache(maxsize=None)
+def positions() -> np.ndarray:
+    """
+    Returns the (468, 3) metric vertex positions
+    """
+    return _read_only(np.ascontiguousarray(load_model()["position"]))
+
+
+@functools.lru_cache(maxsize=None)
+def procrustes_weights() -> np.ndarray:
+    """
+    Returns the (468,) Procrustes weights of the vertices
+    """
+    return _read_only(np.ascontiguousarray(load_model()["procrustes_weight"]))
+
+
+def procrustes_landmark_basis() -> List[Tuple[int, float]]:
+    """
+    Returns the (index, weight) pairs of the vertices with a Procrustes weight
+    """
+    weights = procrustes_weights()
+    return [(int(index), float(weights[index])) for index in np.flatnonzero(weights)]
@@ -0,0 +1,112 @@
+import ctypes
+import socket
+import sys
+from typing import List
+
+MSG_DONTWAIT = 0x40
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [("msg_name", ctypes.c_void_p), ("msg_namelen", ctypes.c_uint32),
+                ("msg_iov", ctypes.POINTER(_IOVec)), ("msg_iovlen", ctypes.c_size_t),
+                ("msg_control", ctypes.c_void_p), ("msg_controllen", ctypes.c_size_t),
+                ("msg_flags", ctypes.c_int)]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_recvmmsg():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        recvmmsg = ctypes.CDLL(None, use_errno=True).recvmmsg
+    except (OSError, AttributeError):
+        return None
+    recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+    recvmmsg.restype = ctypes.c_int
+    return recvmmsg
+
+
+_recvmmsg = _load_recvmmsg()
+
+
+class DatagramReader:
+    """
+    Reads all datagrams waiting in a non-blocking UDP socket into preallocated buffers.
+    On Linux a batch is read with one recvmmsg call, elsewhere with one recv_into per datagram.
+    usage: count = reader.read(); packets = reader.packets(count)
+    The packets are memoryviews into the buffers and only valid until the next read.
+    """
+
+    def __init__(self, sock: socket.socket, batch_size: int = 64, max_size: int = 1024,
+                 use_recvmmsg: bool = True):
+        """
+        Constructor for the reader
+        :param sock: non-blocking datagram socket
+        :param batch_size: maximal number of datagrams per read
+        :param max_size: maximal size of a datagram, longer datagrams are truncated
+        :param use_recvmmsg: If false, never use recvmmsg even if it is available
+        """
+        self.socket = sock
+        self.batch_size = batch_size
+        self.max_size = max_size
+        self.buffer = bytearray(batch_size * max_size)
+        view = memoryview(self.buffer)
+        self._views = [view[i * max_size:(i + 1) * max_size] for i in range(batch_size)]
+        self.lengths = [0] * batch_size
+
+        self._messages = None
+        if use_recvmmsg and _recvmmsg is not None:
+            address = ctypes.addressof((ctypes.c_char * len(self.buffer)).from_buffer(self.buffer))
+            self._iovecs = (_IOVec * batch_size)()
+            self._messages = (_MMsgHdr * batch_size)()
+            for i in range(batch_size):
+                self._iovecs[i].iov_base = address + i * max_size
+                self._iovecs[i].iov_len = max_size
+                self._messages[i].msg_hdr.msg_iov = ctypes.pointer(self._iovecs[i])
+                self._messages[i].msg_hdr.msg_iovlen = 1
+
+    @property
+    def uses_recvmmsg(self) -> bool:
+        return self._messages is not None
+
+    def read(self) -> int:
+        """
+        Reads up to batch_size waiting datagrams without blocking.
+        :return: number of datagrams read, 0 if none was waiting
+        """
+        if self._messages is not None:
+            return self._read_recvmmsg()
+        return self._read_recv_into()
+
+    def _read_recvmmsg(self) -> int:
+        count = _recvmmsg(self.socket.fileno(), self._messages, self.batch_size, MSG_DONTWAIT, None)
+        if count < 0:
+            return 0  # EAGAIN if nothing is waiting, other errors (ICMP reports of earlier sends) are dropped
+        for i in range(count):
+            self.lengths[i] = self._messages[i].msg_len
+        return count
+
+    def _read_recv_into(self) -> int:
+        count = 0
+        while count < self.batch_size:
+            try:
+                self.lengths[count] = self.socket.recv_into(self._views[count])
+            except BlockingIOError:
+                break
+            except ConnectionResetError:
+                continue  # Windows reports ICMP port unreachable of earlier sends on the next receive
+            count += 1
+        return count
+
+    def packets(self, count: int) -> List[memoryview]:
+        """
+        Returns the first count datagrams of the last read.
+        """
+        return [self._views[i][:self.lengths[i]] for i in range(count)]
@@ -0,0 +1,125 @@
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+import FaceMeshOverlay
+from FaceMeshOverlay import LAYERS as FACE_MESH_LAYERS
+from LatencyProfiler import PROFILER
+
+
+class DebugPreview:
+    """
+    Renders the annotated debug image on its own thread, only while a viewer is subscribed.
+    The processing thread calls wants_frame() / submit() every frame, which is a cheap check unless a viewer is
+    subscribed and the last preview is older than 1 / max_fps. Frames are downscaled to fit max_size before drawing.
+    usage: preview.subscribe() when the debug view opens, read preview.image / preview.frame_id when notify is called,
+    and preview.unsubscribe() when it closes.
+    """
+
+    def __init__(self, max_fps: float = 15., max_size: Tuple[int, int] = (640, 360)):
+        """
+        Constructor for the debug preview
+        Args:
+            max_fps: maximal rate of rendered previews
+            max_size: maximal (width, height) of the preview, the aspect ratio is kept
+        """
+        self.max_fps = max_fps
+        self.max_size = max_size
+        self.subscribers = 0
+        self.image: Optional[np.ndarray] = None
+        self.frame_id = 0
+        self.notify: Optional[Callable[[], None]] = None  # called on the render thread after every new preview
+        self.layers = set(FACE_MESH_LAYERS)  # enabled layers of the overlay, see FaceMeshOverlay
+        self.overlay: Optional[FaceMeshOverlay.FaceMeshOverlay] = None  # created on the render thread
+
+        self._last_submit = 0.
+        self._job = None
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self):
+        with self._condition:
+            self.subscribers += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="DebugPreview", daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self):
+        with self._condition:
+            self.subscribers = max(self.subscribers - 1, 0)
+            self._job = None
+
+    def set_max_size(self, max_size: Tuple[int, int]):
+        """
+        Sets the maximal (width, height) of the following previews, e.g. the size of the widget showing them, so the
+        viewer does not have to scale them again.
+        """
+        self.max_size = (max(int(max_size[0]), 1), max(int(max_size[1]), 1))
+
+    def set_layer(self, name: str, enabled: bool):
+        """
+        Switches a layer of the face mesh overlay on or off, see FaceMeshOverlay
+        """
+        if name not in FACE_MESH_LAYERS:
+            raise ValueError(f"Unknown layer {name}, one of {FACE_MESH_LAYERS}")
+        if enabled:
+            self.layers.add(name)
+        else:
+            self.layers.discard(name)
+
+    def wants_frame(self) -> bool:
+        """
+        Returns True if a viewer is subscribed and the next preview is due.
+        """
+        return self.subscribers > 0 and time.perf_counter() - self._last_submit >= 1. / self.max_fps
+
+    def submit(self, landmarks, image: np.ndarray, pose=None, color_order: str = "BGR"):
+        """
+        Hands a frame to the render thread, replaces a frame that was not rendered yet.
+        :param landmarks: mediapipe landmark list of the frame or (N, 3) normalized landmarks
+        :param image: frame, must not be modified afterwards
+        :param pose: rvec, tvec and camera matrix in pixels of image for the pose layer or None
+        :param color_order: channel order of image, "BGR" or "RGB". RGB frames are converted after downscaling.
+        """
+        self._last_submit = time.perf_counter()
+        with self._condition:
+            self._job = (landmarks, image, pose, color_order)
+            self._condition.notify()
+
+    def _render(self, landmarks, image: np.ndarray, pose=None, color_order: str = "BGR") -> np.ndarray:
+        import DrawingDebug
+
+        if self.overlay is None:
+            # imports mediapipe, only needed once someone looks at the preview
+            self.overlay = FaceMeshOverlay.FaceMeshOverlay()
+            self.overlay.layers = self.layers  # share the set, so set_layer applies to the next preview
+
+        height, width = image.shape[:2]
+        max_width, max_height = self.max_size
+        scale = min(max_width / width, max_height / height, 1.)
+        if scale < 1.:
+            size = (max(int(width * scale), 1), max(int(height * scale), 1))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            if pose is not None:
+                rvec, tvec, camera_matrix = pose
+                camera_matrix = camera_matrix.copy()
+                camera_matrix[:2] *= ((size[0] / width,), (size[1] / height,))
+                pose = rvec, tvec, camera_matrix
+        if color_order == "RGB":
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR, dst=image if scale < 1. else None)
+        return DrawingDebug.annotate_landmark_image(landmarks, image, pose, self.overlay)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._job is not None)
+                landmarks, image, pose, color_order = self._job
+                self._job = None
+            with PROFILER.span("debug"):
+                self.image = self._render(landmarks, image, pose, color_order)
+            self.frame_id += 1
+            if self.notify is not None:
+                self.notify()
@@ -1,42 +1,38 @@
-import mediapipe as mp
+from typing import Optional
+
 import cv2
 import numpy as np
 
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
-mp_face_mesh = mp.solutions.face_mesh
-
-
-def annotate_landmark_image(landmarks, image):
-    annotated_image = image.copy()
-    ## different connections possible (lips, eye brows, etc)
-
-    tesselation_drawing_spec = mp_drawing.DrawingSpec(thickness=1, circle_radius=1)
-    contours_drawing_spec = mp_drawing.DrawingSpec((0, 255, 0), thickness=1, circle_radius=1)
-    iris_drawing_spec = mp_drawing.DrawingSpec((255, 0, 0), thickness=1, circle_radius=1)
-    mp_drawing.draw_landmarks(
-        image=annotated_image,
-        landmark_list=landmarks,
-        connections=mp_face_mesh.FACEMESH_TESSELATION,
-        landmark_drawing_spec=tesselation_drawing_spec,
-        connection_drawing_spec=mp_drawing_styles
-        .get_default_face_mesh_tesselation_style())
-    mp_drawing.draw_landmarks(
-        image=annotated_image,
-        landmark_list=landmarks,
-        connections=mp_face_mesh.FACEMESH_CONTOURS,
-        landmark_drawing_spec=contours_drawing_spec,
-        connection_drawing_spec=mp_drawing_styles
-        .get_default_face_mesh_contours_style())
-    mp_drawing.draw_landmarks(
-        image=annotated_image,
-        landmark_list=landmarks,
-        connections=mp_face_mesh.FACEMESH_IRISES,
-        landmark_drawing_spec=iris_drawing_spec,
-        connection_drawing_spec=mp_drawing_styles
-        .get_default_face_mesh_iris_connections_style())
-
-    return cv2.flip(annotated_image, 1)
+import LandmarkExtractor
+from FaceMeshOverlay import FaceMeshOverlay, Pose
+
+_overlay: Optional[FaceMeshOverlay] = None
+
+
+def default_overlay() -> FaceMeshOverlay:
+    """
+    Overlay used by annotate_landmark_image if no overlay is given, created on first use
+    """
+    global _overlay
+    if _overlay is None:
+        _overlay = FaceMeshOverlay()
+    return _overlay
+
+
+def annotate_landmark_image(landmarks, image, pose: Optional[Pose] = None, overlay: Optional[FaceMeshOverlay] = None):
+    """
+    Returns a mirrored copy of image with the face mesh drawn on it
+    :param landmarks: mediapipe landmark list or (N, 3) normalized landmarks
+    :param image: BGR image
+    :param pose: rvec, tvec and camera matrix in pixels of image for the pose layer
+    :param overlay: overlay with the enabled layers, default_overlay() if None
+    """
+    if not isinstance(landmarks, np.ndarray):
+        landmarks = LandmarkExtractor.landmarks_to_numpy(landmarks)
+    if overlay is None:
+        overlay = default_overlay()
+    annotated_image = overlay.draw(image.copy(), landmarks, pose)
+    return cv2.flip(annotated_image, 1, dst=annotated_image)
 
 
 def show_por(x_pixel, y_pixel, width, height):
@@ -0,0 +1,536 @@
+import socket
+import selectors
+import json
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+import CameraCapture
+import DatagramReader
+import DebugPreview
+import FaceMeshWorker
+import LandmarkExtractor
+import Recording
+from SnapshotMailbox import SnapshotMailbox
+from Signal import Signal
+from KalmanFilter1D import KalmanBank
+import FPSCounter
+from LatencyProfiler import PROFILER
+
+from pyLiveLinkFace import FaceBlendShape
+from LiveLinkFaceReceiver import LiveLinkFaceDevice, LiveLinkFaceReceiver
+
+Sink = Callable[[Dict[str, Signal]], None]
+DeviceSink = Callable[[LiveLinkFaceDevice], None]
+
+
+class Engine:
+    """
+    Processing core of gesture mouse without any Qt or GUI dependencies.
+    Reads frames from the webcam (mediapipe), the LiveLinkFace app or a recording, updates the signals and passes
+    them to the mouse and to the registered sinks. Call run() on a thread of your choice and stop() to end it.
+    """
+
+    def __init__(self, mouse=None):
+        """
+        Constructor for the engine
+        :param mouse: Mouse.Mouse used for gesture mouse output or None to run without mouse output
+        """
+        super().__init__()
+        self.is_running = False
+        self.mouse_enabled = False
+        self.mouse = mouse
+        self.sinks: List[Sink] = []
+        self.device_sinks: List[DeviceSink] = []
+        self.signal_subscriptions: Dict[str, int] = {}
+        self.snapshot_mailbox = SnapshotMailbox()  # newest signal values for the GUI, see SnapshotMailbox
+
+        self.frame_width, self.frame_height = (1280, 720)
+        self.debug_preview = DebugPreview.DebugPreview()
+        self.fps_counter = FPSCounter.FPSCounter(20)
+        self.fps = 0
+        self.camera = CameraCapture.CameraCapture(0, self.frame_width, self.frame_height, color_order="RGB")
+
+        self.UDP_PORT = 11111
+        self.socket = None
+        self.selector = None
+        self.socket_reader: Optional[DatagramReader.DatagramReader] = None
+        self.batch_packets = True  # drain bursts in one read and only output the newest frame of every device
+        self.socket_timeout = 0.1  # seconds between checks of is_running while no packets arrive
+        self.live_link_receiver = LiveLinkFaceReceiver()
+
+        self.camera_parameters = (1000, 1000, 1280 / 2, 720 / 2)
+        self.signal_calculator = None  # created when the first landmarks are processed, see __create_signal_calculator
+
+        self.use_mediapipe = False
+        self.facemesh_process = False  # run capture and FaceMesh in a worker process, see FaceMeshWorker
+        self.facemesh_worker: Optional[FaceMeshWorker.FaceMeshWorker] = None  # the last started worker
+        self.filter_landmarks = False
+        self.landmark_kalman = KalmanBank((468, 2), R=0.008 ** 2)
+        self.landmark_extractor = LandmarkExtractor.LandmarkExtractor(478)
+
+        self.signals: Dict[str, Signal] = {}
+        self.iphone_config = "config/iphone_default.json"
+        self.mediapipe_config = "config/mediapipe_default.json"
+
+        self.recorder: Optional[Recording.SessionRecorder] = None
+        self.recorder_lock = threading.Lock()
+        self.replay_path: Optional[str] = None
+        self.replay_realtime = True
+
+    def run(self):
+        self.is_running = True
+        while self.is_running:
+            if self.replay_path is not None:
+                self.__run_replay()
+                self.stop()
+            elif self.use_mediapipe:
+                self.setup_signals(self.mediapipe_config)
+                if self.facemesh_process:
+                    self.__run_facemesh_worker()
+                else:
+                    self.__start_camera()
+                    self.__run_mediapipe()
+                    self.__stop_camera()
+            else:
+                self.setup_signals(self.iphone_config)
+                self.__start_socket()
+                self.__run_livelinkface()
+                self.__stop_socket()
+
+    def __create_signal_calculator(self):
+        # mediapipe and the face model are heavy imports, only load them when landmarks are actually processed
+        import SignalsCalculator
+
+        if self.signal_calculator is None:
+            self.signal_calculator = SignalsCalculator.SignalsCalculater(
+                camera_parameters=self.camera_parameters, frame_size=(self.frame_width, self.frame_height),
+                pose_tracking=True)
+            self.signal_calculator.set_filter_value("screen_xy", 0.022)
+
+    def __start_mediapipe(self):
+        import mediapipe as mp
+
+        self.__create_signal_calculator()
+        return mp.solutions.face_mesh.FaceMesh(refine_landmarks=True)
+
+    def __run_mediapipe(self):
+        with self.__start_mediapipe() as face_mesh:
+            while self.is_running and self.camera.is_opened() and self.use_mediapipe and not self.facemesh_process:
+                with PROFILER.span("capture"):
+                    success, image = self.camera.read()
+                if not success:
+                    continue
+                with PROFILER.span("frame"):
+                    # the capture thread already converted the frame to RGB, see CameraCapture.color_order
+                    image.flags.writeable = False
+                    with PROFILER.span("facemesh"):
+                        results = face_mesh.process(image)
+
+                    if not results.multi_face_landmarks:
+                        self.signal_calculator.head_pose_calculator.reset_tracking()
+                        continue
+                    landmarks = results.multi_face_landmarks[0]
+                    with PROFILER.span("extract"):
+                        np_landmarks = self.landmark_extractor(landmarks)
+                    self.process_landmarks(np_landmarks)
+
+                    # Debug, rendered on the preview thread and only while someone is looking
+                    if self.debug_preview.wants_frame():
+                        # the camera reuses its buffer, the preview is converted to BGR after downscaling
+                        self.debug_preview.submit(landmarks, image.copy(), self.preview_pose(), color_order="RGB")
+                    # DrawingDebug.show_por(x_pixel, y_pixel, self.monitor.w_pixels, self.monitor.h_pixels)
+
+                self.fps = self.fps_counter()
+
+    def __run_facemesh_worker(self):
+        self.__create_signal_calculator()
+        np_landmarks = self.landmark_extractor.landmarks
+        self.facemesh_worker = FaceMeshWorker.FaceMeshWorker(self.camera.device, self.frame_width, self.frame_height)
+        with self.facemesh_worker as worker:
+            while self.is_running and self.use_mediapipe and self.facemesh_process and worker.is_alive():
+                frame = worker.receive(self.socket_timeout)
+                if frame is None:
+                    continue
+                if PROFILER.enabled:
+                    for name, duration_ns in zip(FaceMeshWorker.WORKER_STAGES, worker.durations_ns):
+                        PROFILER.record(name, duration_ns)
+                with PROFILER.span("frame"):
+                    if not frame.has_face:
+                        worker.release(frame)
+                        self.signal_calculator.head_pose_calculator.reset_tracking()
+                        continue
+                    # the slot goes back to the worker right away, so it never waits for the signal processing
+                    preview_image = frame.image.copy() if self.debug_preview.wants_frame() else None
+                    np.copyto(np_landmarks, frame.landmarks)
+                    worker.release(frame)
+                    self.process_landmarks(np_landmarks)
+
+                    if preview_image is not None:
+                        self.debug_preview.submit(np_landmarks.copy(), preview_image, self.preview_pose(),
+                                                  color_order="RGB")
+
+                self.fps = self.fps_counter()
+
+    @property
+    def dropped_frames(self) -> int:
+        """
+        Frames the webcam source dropped because processing was too slow, counted by the FaceMesh worker in worker
+        mode and by the camera otherwise
+        """
+        if self.facemesh_process and self.facemesh_worker is not None:
+            return self.facemesh_worker.dropped_frames
+        return self.camera.dropped_frames
+
+    def preview_pose(self):
+        """
+        Head pose of the last frame for the pose layer of the debug preview, None if no signal needed it
+        """
+        pose = self.signal_calculator.frame.cached_pose
+        if pose is None:
+            return None
+        camera_matrix = self.signal_calculator.head_pose_calculator.get_camera_matrix(self.camera_parameters)
+        return pose[0].copy(), pose[1].copy(), camera_matrix
+
+    def process_landmarks(self, np_landmarks: np.ndarray):
+        """
+        Runs one frame of mediapipe landmarks through the landmark filter, the signal calculator, the signals and
+        the outputs.
+        :param np_landmarks: (478, 3) normalized landmarks, filtered in place if landmark filtering is enabled
+        """
+        with self.recorder_lock:
+            if self.recorder is not None:
+                self.recorder.record_landmarks(np_landmarks)
+
+        if self.filter_landmarks:
+            with PROFILER.span("filter"):
+                np_landmarks[:468, :2] = self.landmark_kalman.update(np_landmarks[:468, :2])
+
+        with PROFILER.span("signals"):
+            result = self.signal_calculator.process(np_landmarks, self.active_signal_names())
+
+        with PROFILER.span("actions"):
+            for signal_name, value in result.items():
+                self.signals[signal_name].set_value(value)
+            self.__output_signals()
+
+    def active_signal_names(self) -> List[str]:
+        """
+        Returns the names of the signals that have listeners: subscriptions (e.g. visible plots), actions and the axes
+        of the gesture mouse. While sinks are registered, all signals are active, because sinks receive all signals.
+        """
+        if self.sinks:
+            return list(self.signals)
+        names = [name for name, signal in self.signals.items()
+                 if signal.actions or self.signal_subscriptions.get(name, 0) > 0]
+        if self.mouse_enabled:
+            names += [name for name in (self.mouse.updown_signal, self.mouse.leftright_signal) if name not in names]
+        return names
+
+    def __run_livelinkface(self):
+        while self.is_running and not self.use_mediapipe:
+            # sleeps until a packet arrives, the timeout only serves to notice stop() / source changes
+            if not self.selector.select(self.socket_timeout):
+                continue
+            if self.batch_packets:
+                count = self.socket_reader.read()
+                while count:
+                    self.process_packets(self.socket_reader.packets(count))
+                    count = self.socket_reader.read()
+            else:
+                for data in self.__receive_pending():
+                    self.process_packet(data)
+
+    def __receive_pending(self):
+        """
+        Yields all datagrams that are waiting in the socket, a burst is drained in one wake-up.
+        """
+        while True:
+            try:
+                data, addr = self.socket.recvfrom(1024)
+            except BlockingIOError:
+                return
+            except ConnectionResetError:
+                continue  # Windows reports ICMP port unreachable of earlier sends on the next receive
+            yield data
+
+    def process_packets(self, packets: List[memoryview]):
+        """
+        Processes a burst of LiveLinkFace UDP packets. Every frame updates the filters, but only the newest frame of
+        every device updates the actions and is passed to the mouse and the sinks.
+        :param packets: received packets in the order of arrival
+        """
+        newest = {self.live_link_receiver.device_key(data): i for i, data in enumerate(packets)}
+        for i, data in enumerate(packets):
+            self.process_packet(data, output=newest[self.live_link_receiver.device_key(data)] == i)
+
+    def process_packet(self, data: bytes, output: bool = True):
+        """
+        Records, decodes and processes one LiveLinkFace UDP packet.
+        :param data: received bytes or memoryview
+        :param output: If false, the frame only updates the filters of the signals, see Signal.update_filter
+        """
+        with self.recorder_lock:
+            if self.recorder is not None:
+                self.recorder.record_packet(data)
+
+        with PROFILER.span("decode"):
+            device = self.live_link_receiver.receive(data)
+        if device is None:
+            return
+        with PROFILER.span("actions"):
+            if self.device_sinks:
+                if device.signals is None:
+                    device.signals = self.load_signals(self.iphone_config)
+                device.update_signals(filter_only=not output)
+                if output:
+                    for sink in self.device_sinks:
+                        sink(device)
+            if self.live_link_receiver.fuse:
+                self.process_blend_shapes(self.live_link_receiver.fuse_blend_shapes(device.last_packet), output)
+            elif self.live_link_receiver.is_output(device):
+                self.process_blend_shapes(device.blend_shapes, output)
+
+    def process_blend_shapes(self, blend_shapes: np.ndarray, output: bool = True):
+        """
+        Runs one frame of LiveLinkFace blend shapes through the signals and the outputs.
+        :param blend_shapes: (61,) blend shape values ordered like FaceBlendShape
+        :param output: If false, only update the filters of the signals
+        """
+        values = blend_shapes.tolist()
+        if not output:
+            for signal_name, signal in self.signals.items():
+                signal.update_filter(values[FaceBlendShape[signal_name].value])
+            return
+        for signal_name, signal in self.signals.items():
+            signal.set_value(values[FaceBlendShape[signal_name].value])
+        self.__output_signals()
+
+    def __output_signals(self):
+        if self.mouse_enabled:
+            self.mouse.process_signal(self.signals)
+        for sink in self.sinks:
+            sink(self.signals)
+        self.snapshot_mailbox.publish(self.signals, self.fps)
+
+    def __run_replay(self):
+        replay = Recording.SessionReplay(self.replay_path)
+        if replay.has_landmarks:
+            self.setup_signals(self.mediapipe_config)
+            self.__create_signal_calculator()
+            np_landmarks = np.zeros(replay.landmarks.shape[1:])
+        else:
+            self.setup_signals(self.iphone_config)
+
+        for timestamp, frame in replay.frames(self.replay_realtime):
+            if not self.is_running:
+                break
+            if replay.has_landmarks:
+                np_landmarks[...] = frame
+                self.process_landmarks(np_landmarks)
+            else:
+                self.process_packet(frame)
+            self.fps = self.fps_counter()
+
+    def start_recording(self, path: str):
+        """
+        Starts recording the landmarks or LiveLinkFace packets of the current session into a recording directory,
+        see Recording.
+        :param path: directory of the recording
+        """
+        recorder = Recording.SessionRecorder(path)
+        with self.recorder_lock:
+            old_recorder, self.recorder = self.recorder, recorder
+        if old_recorder is not None:
+            old_recorder.close()
+
+    def stop_recording(self):
+        with self.recorder_lock:
+            recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+
+    def set_replay(self, path: Optional[str], realtime: bool = True):
+        """
+        Replays a recording instead of reading the webcam or the LiveLinkFace app, the engine stops at its end.
+        :param path: directory of the recording or None to use the live sources
+        :param realtime: If true, replay at the recorded speed, else as fast as possible
+        """
+        self.replay_path = path
+        self.replay_realtime = realtime
+
+    def __start_camera(self):
+        self.camera.start()
+
+    def __stop_camera(self):
+        self.camera.stop()
+
+    def __start_socket(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.socket.bind(("", self.UDP_PORT))
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.socket, selectors.EVENT_READ)
+        self.socket_reader = DatagramReader.DatagramReader(self.socket, max_size=Recording.MAX_PACKET_SIZE)
+        self.live_link_receiver.reset()
+
+    def __stop_socket(self):
+        if self.selector is not None:
+            self.selector.close()
+            self.selector = None
+        if self.socket is not None:
+            self.socket_reader = None
+            self.socket.close()
+            self.socket = None
+
+    def record_neutral(self):
+        with self.__start_mediapipe() as face_mesh:
+            success, image = self.camera.read()
+            if not success:
+                return False
+            results = face_mesh.process(image)
+
+            if not results.multi_face_landmarks:
+                return False
+
+            landmarks = results.multi_face_landmarks[0]
+            np_landmarks = LandmarkExtractor.landmarks_to_numpy(landmarks)[:, :2] * (self.frame_width,
+                                                                                    self.frame_height)
+            self.signal_calculator.process_neutral(np_landmarks)
+
+            return True
+
+    def stop(self):
+        self.is_running = False
+
+    def add_sink(self, sink: Sink):
+        """
+        Adds a sink that is called with the updated signals after every frame.
+        :param sink: function taking the signal dict
+        """
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink: Sink):
+        """
+        Removes a previously added sink
+        :param sink: sink to remove
+        """
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+
+    def subscribe_signal(self, name: str):
+        """
+        Requests the signal to be computed every frame, e.g. while it is plotted. Signals without actions or
+        subscriptions are not computed for mediapipe landmarks, see active_signal_names.
+        :param name: name of the signal
+        """
+        self.signal_subscriptions[name] = self.signal_subscriptions.get(name, 0) + 1
+
+    def unsubscribe_signal(self, name: str):
+        count = self.signal_subscriptions.get(name, 0)
+        if count <= 1:
+            self.signal_subscriptions.pop(name, None)
+        else:
+            self.signal_subscriptions[name] = count - 1
+
+    def add_device_sink(self, sink: DeviceSink):
+        """
+        Adds a sink that is called with the LiveLinkFace device after every frame of that device.
+        Every device has its own signals (device.signals) set up from the iphone config with their own filters.
+        :param sink: function taking the device
+        """
+        self.device_sinks.append(sink)
+
+    def remove_device_sink(self, sink: DeviceSink):
+        if sink in self.device_sinks:
+            self.device_sinks.remove(sink)
+
+    def set_live_link_device(self, uuid: Optional[str]):
+        """
+        Pins the LiveLinkFace device whose frames drive the signals.
+        :param uuid: subject uuid of the device or None to follow the first device that sends
+        """
+        self.live_link_receiver.set_pinned_device(uuid)
+
+    def set_fuse_live_link_devices(self, enabled: bool):
+        """
+        If enabled, the signals are driven by the mean of all LiveLinkFace devices that currently send.
+        """
+        self.live_link_receiver.fuse = enabled
+
+    def disable_gesture_mouse(self):
+        # Disables gesture mouse and enables normal mouse input
+        self.mouse_enabled = False
+        if self.mouse is not None:
+            self.mouse.disable_gesture()
+
+    def enable_gesture_mouse(self):
+        # Disables normal mouse and enables gesture mouse
+        if self.mouse is None:
+            return
+        self.mouse_enabled = True
+        self.mouse.enable_gesture()
+
+    def toggle_gesture_mouse(self):
+        # Toggles between gesture and normal mouse
+        if self.mouse_enabled:
+            self.disable_gesture_mouse()
+        else:
+            self.enable_gesture_mouse()
+
+    def set_filter_value(self, name: str, filter_value: float):
+        signal = self.signals.get(name, None)
+        if signal is not None:
+            signal.set_filter_value(filter_value)
+
+    def set_use_mediapipe(self, selected: bool):
+        self.use_mediapipe = selected
+
+    def set_facemesh_process(self, enabled: bool):
+        """
+        Runs capture and FaceMesh in a worker process instead of the engine thread, a running webcam source is
+        restarted in the selected mode.
+        """
+        self.facemesh_process = enabled
+
+    def set_batch_packets(self, enabled: bool):
+        self.batch_packets = enabled
+
+    def set_filter_landmarks(self, enabled: bool):
+        self.filter_landmarks = enabled
+        if enabled:
+            self.landmark_kalman.reset()
+
+    def toggle_mouse_mode(self):
+        if self.mouse is not None:
+            self.mouse.toggle_mode()
+
+    def setup_signals(self, json_path: str):
+        """
+        Reads a config file and setup ups the available signals.
+        :param json_path: Path to json
+        """
+        self.signals = self.load_signals(json_path)
+
+    @staticmethod
+    def load_signals(json_path: str) -> Dict[str, Signal]:
+        """
+        Reads a config file and creates its signals.
+        :param json_path: Path to json
+        """
+        parsed_signals = json.load(open(json_path, "r"))
+        signals = dict()
+        for json_signal in parsed_signals:
+            # read values
+            name = json_signal["name"]
+            lower_threshold = json_signal["lower_threshold"]
+            higher_threshold = json_signal["higher_threshold"]
+            filter_value = json_signal["filter_value"]
+
+            # construct signal
+            signal = Signal(name)
+            signal.set_filter_value(filter_value)
+            signal.set_threshold(lower_threshold, higher_threshold)
+            signals[name] = signal
+        return signals
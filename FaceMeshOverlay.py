@@ -0,0 +1,116 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# BGR colours and thicknesses of the default mediapipe face mesh style
+_RED = (48, 48, 255)
+_GREEN = (48, 255, 48)
+_GRAY = (128, 128, 128)
+_WHITE = (224, 224, 224)
+
+LAYERS = ("tesselation", "contours", "irises", "landmarks", "pose")
+
+Pose = Tuple[np.ndarray, np.ndarray, np.ndarray]  # rvec, tvec and camera matrix in pixels of the drawn image
+
+
+# origin and x, y, z axis end points of the drawn head pose in cm
+POSE_AXES = np.array([[0., -20., 0.], [50., -20., 0.], [0., -70., 0.], [0., -20., -50.]])
+POSE_AXES_COLORS = ((0, 255, 255), (255, 0, 255), (255, 255, 0))
+
+
+def draw_pose_axes(img, r, t, cam, dist=None):
+    """
+    Draws the axes of a head pose
+    :param img: BGR image, drawn into in place
+    :param r: rotation vector of the pose
+    :param t: translation vector of the pose
+    :param cam: camera matrix in pixels of img
+    :param dist: distortion coefficients or None
+    """
+    projected, _ = cv2.projectPoints(POSE_AXES, r, t, cam, dist)
+    origin, *axes = projected[:, 0].astype(int).tolist()
+    for end, color in zip(axes, POSE_AXES_COLORS):
+        cv2.line(img, origin, end, color, 2)
+
+
+def _edges(connections: Iterable[Tuple[int, int]]) -> np.ndarray:
+    return np.array(sorted(connections), dtype=np.intp).reshape(-1, 2)
+
+
+class FaceMeshOverlay:
+    """
+    Draws the face mesh of normalized landmarks in the mediapipe default style, in layers that can be switched on and
+    off: tesselation, contours, irises, landmarks (points) and pose (head pose axes, needs the pose of the frame).
+    The connections are gathered into index arrays once, so every layer colour is drawn with one cv2.polylines call.
+    usage: overlay.set_layer("tesselation", False); overlay.draw(image, landmarks, pose)
+    """
+
+    def __init__(self, layers: Optional[Iterable[str]] = None):
+        """
+        Constructor for the overlay
+        :param layers: names of the enabled layers, all layers of LAYERS if None
+        """
+        from mediapipe.python.solutions import face_mesh_connections as connections
+
+        self.layers = set(LAYERS if layers is None else layers)
+        # (colour, thickness, (K, 2) landmark indices of the edges) per layer
+        self.edge_groups: Dict[str, List[Tuple[Tuple[int, int, int], int, np.ndarray]]] = {
+            "tesselation": [(_GRAY, 1, _edges(connections.FACEMESH_TESSELATION))],
+            "contours": [(_WHITE, 2, _edges(connections.FACEMESH_LIPS | connections.FACEMESH_FACE_OVAL)),
+                         (_GREEN, 2, _edges(connections.FACEMESH_LEFT_EYE | connections.FACEMESH_LEFT_EYEBROW)),
+                         (_RED, 2, _edges(connections.FACEMESH_RIGHT_EYE | connections.FACEMESH_RIGHT_EYEBROW))],
+            "irises": [(_GREEN, 2, _edges(connections.FACEMESH_LEFT_IRIS)),
+                       (_RED, 2, _edges(connections.FACEMESH_RIGHT_IRIS))],
+        }
+        self.landmark_color = (255, 0, 0)
+        self._pixels = None
+
+    def set_layer(self, name: str, enabled: bool):
+        if name not in LAYERS:
+            raise ValueError(f"Unknown layer {name}, one of {LAYERS}")
+        if enabled:
+            self.layers.add(name)
+        else:
+            self.layers.discard(name)
+
+    def _to_pixels(self, landmarks: np.ndarray, width: int, height: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pixel coordinates of the landmarks like mediapipe drawing_utils: floor(x * width), landmarks outside of the
+        image are invalid.
+        :return: (N, 2) int32 pixels and (N,) mask of the valid landmarks
+        """
+        xy = landmarks[:, :2]
+        valid = ((xy >= 0.) & (xy <= 1.)).all(1)
+        if self._pixels is None or len(self._pixels) != len(landmarks):
+            self._pixels = np.empty((len(landmarks), 2), dtype=np.int32)
+        np.floor(xy * (width, height), out=self._pixels, casting="unsafe")
+        np.minimum(self._pixels, (width - 1, height - 1), out=self._pixels)
+        return self._pixels, valid
+
+    def draw(self, image: np.ndarray, landmarks: np.ndarray, pose: Optional[Pose] = None) -> np.ndarray:
+        """
+        Draws the enabled layers into image
+        :param image: BGR image, drawn into in place
+        :param landmarks: (N, 3) normalized landmarks
+        :param pose: rvec, tvec and camera matrix of the head pose for the pose layer, the layer is skipped if None
+        :return: image
+        """
+        height, width = image.shape[:2]
+        pixels, valid = self._to_pixels(landmarks, width, height)
+        all_valid = valid.all()
+        for layer in ("tesselation", "contours", "irises"):
+            if layer not in self.layers:
+                continue
+            for color, thickness, edges in self.edge_groups[layer]:
+                if not all_valid:
+                    edges = edges[valid[edges].all(1)]
+                if len(edges):
+                    cv2.polylines(image, pixels[edges], False, color, thickness)
+        if "landmarks" in self.layers and valid.any():
+            points = pixels[valid]
+            # zero length segments, drawn as dots
+            cv2.polylines(image, np.stack((points, points), 1), False, self.landmark_color, 2)
+        if "pose" in self.layers and pose is not None:
+            draw_pose_axes(image, *pose)
+        return image
@@ -0,0 +1,255 @@
+import multiprocessing
+import time
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+import CameraCapture
+import LandmarkExtractor
+
+# stages timed in the worker, sent with every frame and recorded into the profiler of the main process
+WORKER_STAGES = ("capture", "convert", "facemesh", "extract")
+
+
+class SharedFrameRing:
+    """
+    Ring of slots in one shared memory block, every slot holds an RGB frame and the landmarks found in it.
+    The process that creates the ring owns the block and unlinks it, other processes attach by name, see spec().
+    """
+
+    def __init__(self, slots: int, frame_shape: Tuple[int, int, int], num_landmarks: int = 478,
+                 name: Optional[str] = None):
+        """
+        Constructor for the ring
+        :param slots: number of slots
+        :param frame_shape: (height, width, 3) of the frames
+        :param num_landmarks: number of landmarks per frame
+        :param name: name of an existing ring to attach to or None to create a new one
+        """
+        self.slots = slots
+        self.frame_shape = tuple(frame_shape)
+        self.num_landmarks = num_landmarks
+        landmark_bytes = slots * num_landmarks * 3 * np.dtype(np.float64).itemsize
+        size = landmark_bytes + slots * int(np.prod(self.frame_shape))
+        self.shared_memory = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.landmarks = np.ndarray((slots, num_landmarks, 3), dtype=np.float64, buffer=self.shared_memory.buf)
+        self.frames = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8, buffer=self.shared_memory.buf,
+                                 offset=landmark_bytes)
+
+    def spec(self) -> tuple:
+        """
+        Arguments to attach to this ring from another process: SharedFrameRing(*ring.spec())
+        """
+        return self.slots, self.frame_shape, self.num_landmarks, self.shared_memory.name
+
+    def close(self):
+        self.landmarks = None
+        self.frames = None
+        try:
+            self.shared_memory.close()
+        except BufferError:
+            pass  # views of slots are still alive, the mapping is released together with them
+
+    def unlink(self):
+        self.shared_memory.unlink()
+
+
+@dataclass
+class WorkerFrame:
+    """
+    A frame of the worker, its image and landmarks stay valid until it is released.
+    """
+    slot: int
+    frame_id: int
+    has_face: bool
+    image: np.ndarray  # (height, width, 3) RGB view into the ring
+    landmarks: np.ndarray  # (num_landmarks, 3) normalized landmarks, view into the ring, undefined without a face
+
+
+def _read_frame(camera, target: np.ndarray) -> Tuple[bool, int, int]:
+    """
+    Reads the next camera frame and converts it to RGB directly into target.
+    :return: success, capture and conversion time in nanoseconds
+    """
+    start = time.perf_counter_ns()
+    success, image = camera.read()
+    capture_ns = time.perf_counter_ns() - start
+    if not success:
+        return False, capture_ns, 0
+    start = time.perf_counter_ns()
+    if image.shape != target.shape:
+        # the camera ignored the requested resolution
+        image = cv2.resize(image, (target.shape[1], target.shape[0]), interpolation=cv2.INTER_AREA)
+    cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=target)
+    return True, capture_ns, time.perf_counter_ns() - start
+
+
+def run_worker(connection, stop_event, ring_spec: tuple, device: int, frame_width: int, frame_height: int,
+               camera_factory=CameraCapture.CameraCapture):
+    """
+    Main function of the worker process: captures frames, converts them to RGB directly into a free slot of the ring,
+    runs FaceMesh on them and extracts the landmarks into the same slot.
+    Every frame is announced as (slot, frame_id, has_face, durations) on connection, the main process sends the slot
+    back when it is done with it. Without a free slot the worker waits, so it never overwrites a slot in use.
+    """
+    import mediapipe as mp
+
+    ring = SharedFrameRing(*ring_spec)
+    free_slots = list(range(ring.slots))
+    camera = camera_factory(device, frame_width, frame_height)
+    camera.start()
+    frame_id = 0
+    try:
+        with mp.solutions.face_mesh.FaceMesh(refine_landmarks=True) as face_mesh:
+            while not stop_event.is_set() and camera.is_opened():
+                while connection.poll():
+                    free_slots.append(connection.recv())
+                if not free_slots:
+                    if connection.poll(0.1):
+                        free_slots.append(connection.recv())
+                    continue
+
+                slot = free_slots.pop()
+                image = ring.frames[slot]
+                image.flags.writeable = True
+                success, capture_ns, convert_ns = _read_frame(camera, image)
+                if not success:
+                    free_slots.append(slot)
+                    continue
+
+                image.flags.writeable = False
+                start = time.perf_counter_ns()
+                results = face_mesh.process(image)
+                facemesh_ns = time.perf_counter_ns() - start
+
+                start = time.perf_counter_ns()
+                has_face = bool(results.multi_face_landmarks)
+                if has_face:
+                    landmark_list = results.multi_face_landmarks[0]
+                    if len(landmark_list.landmark) == ring.num_landmarks:
+                        LandmarkExtractor.landmarks_to_numpy(landmark_list, ring.landmarks[slot])
+                    else:
+                        has_face = False
+                extract_ns = time.perf_counter_ns() - start
+
+                connection.send((slot, frame_id, has_face, (capture_ns, convert_ns, facemesh_ns, extract_ns)))
+                frame_id += 1
+    except (EOFError, BrokenPipeError):
+        pass  # the main process went away
+    finally:
+        camera.stop()
+        ring.close()
+
+
+class FaceMeshWorker:
+    """
+    Runs capture, colour conversion and FaceMesh in a separate process, so they neither compete with the GUI and the
+    signal processing for the GIL nor stall them. Frames and landmarks are handed over in a SharedFrameRing, only
+    the slot index and a few numbers go through the pipe.
+    usage: worker.start(), then frame = worker.receive() and worker.release(frame) for every frame, worker.stop()
+    receive() always returns the newest frame, older waiting frames are released and counted as dropped.
+    """
+
+    def __init__(self, device: int = 0, frame_width: int = 1280, frame_height: int = 720, slots: int = 4,
+                 num_landmarks: int = 478, camera_factory=CameraCapture.CameraCapture):
+        """
+        Constructor for the worker
+        :param device: index of the camera passed to cv2.VideoCapture
+        :param frame_width: frame width, frames of other sizes are resized
+        :param frame_height: frame height
+        :param slots: number of slots of the ring, at least 2 (one written by the worker, one read here)
+        :param num_landmarks: number of landmarks per frame, 478 with refined landmarks
+        :param camera_factory: called in the worker process with device, frame_width and frame_height, returns an
+        object with the interface of CameraCapture. Has to be picklable, e.g. a module level class.
+        """
+        assert slots >= 2
+        self.device = device
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.slots = slots
+        self.num_landmarks = num_landmarks
+        self.camera_factory = camera_factory
+
+        self.ring: Optional[SharedFrameRing] = None
+        self.process = None
+        self.connection = None
+        self.stop_event = None
+        self.durations_ns = (0, 0, 0, 0)  # WORKER_STAGES of the last received frame
+        self.frame_count = 0
+        self.dropped_frames = 0
+
+    def start(self):
+        """
+        Creates the ring and starts the worker process.
+        """
+        # spawn instead of fork, forking a process with running Qt and capture threads is not safe
+        context = multiprocessing.get_context("spawn")
+        self.ring = SharedFrameRing(self.slots, (self.frame_height, self.frame_width, 3), self.num_landmarks)
+        self.connection, child_connection = context.Pipe()
+        self.stop_event = context.Event()
+        self.process = context.Process(target=run_worker, name="FaceMeshWorker", daemon=True,
+                                       args=(child_connection, self.stop_event, self.ring.spec(), self.device,
+                                             self.frame_width, self.frame_height, self.camera_factory))
+        self.process.start()
+        child_connection.close()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stops the worker process and frees the ring.
+        """
+        if self.process is not None:
+            self.stop_event.set()
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.process = None
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring.unlink()
+            self.ring = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def receive(self, timeout: float = 0.1) -> Optional[WorkerFrame]:
+        """
+        Waits for a frame of the worker and returns the newest one.
+        :param timeout: maximal time to wait in seconds
+        :return: the frame, which has to be released, or None if no frame arrived in time
+        """
+        try:
+            if not self.connection.poll(timeout):
+                return None
+            message = self.connection.recv()
+            while self.connection.poll():
+                self.connection.send(message[0])
+                self.dropped_frames += 1
+                message = self.connection.recv()
+        except (EOFError, OSError):
+            return None  # the worker died, see is_alive
+        slot, frame_id, has_face, self.durations_ns = message
+        self.frame_count += 1
+        return WorkerFrame(slot, frame_id, has_face, self.ring.frames[slot], self.ring.landmarks[slot])
+
+    def release(self, frame: WorkerFrame):
+        """
+        Hands the slot of a received frame back to the worker, its image and landmarks must not be used afterwards.
+        """
+        try:
+            self.connection.send(frame.slot)
+        except (BrokenPipeError, OSError):
+            pass
@@ -0,0 +1,166 @@
+"""
+Geometric face features as kernels over index tables.
+
+Every kernel takes landmarks of shape (..., N, D), e.g. (478, 3) for one frame or (T, 478, 3) for a recording, and an
+index table of shape (K, n) with n landmark indices per feature, and returns the K features as (..., K).
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# point pairs of the kernels, as arrays to avoid converting lists on every call
+_DISTANCE_FIRST, _DISTANCE_SECOND = np.array([0, 2]), np.array([1, 3])
+_CROSS_FIRST, _CROSS_SECOND = np.array([2, 3, 3, 2]), np.array([0, 1, 0, 1])
+_FIVE_POINT_FIRST, _FIVE_POINT_SECOND = np.array([1, 2, 1, 2]), np.array([3, 4, 4, 3])
+_EAR_FIRST, _EAR_SECOND = np.array([1, 2, 0]), np.array([5, 4, 3])
+
+
+def _norms(points: np.ndarray, first, second) -> np.ndarray:
+    """
+    Distances between the points first[i] and second[i] of every feature
+    :param points: (..., K, n, D) points of the features
+    :return: (..., K, len(first))
+    """
+    differences = points[..., first, :] - points[..., second, :]
+    return np.sqrt((differences * differences).sum(-1))
+
+
+def _determinants(points: np.ndarray, first, second) -> np.ndarray:
+    """
+    Determinants of the homogeneous 2D points (P1, first[i], second[i]), i.e. the cross products of first[i] - P1 and
+    second[i] - P1
+    :param points: (..., K, n, 2) points of the features
+    :return: (..., K, len(first))
+    """
+    a = points[..., first, :] - points[..., :1, :]
+    b = points[..., second, :] - points[..., :1, :]
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+
+def distance_ratios(landmarks: np.ndarray, indices) -> np.ndarray:
+    """
+    Distance of the first two points divided by the distance of the last two points
+    :param indices: (K, 4) indices P1, P2, P3, P4
+    :return: |P1 P2| / |P3 P4|
+    """
+    norms = _norms(landmarks[..., np.asarray(indices), :], _DISTANCE_FIRST, _DISTANCE_SECOND)
+    return norms[..., 0] / norms[..., 1]
+
+
+def cross_ratios(landmarks: np.ndarray, indices) -> np.ndarray:
+    """
+    Cross ratio of 4 "almost" colinear points in the xy plane, invariant under projective transformations
+    :param indices: (K, 4) indices P1, P2, P3, P4
+    :return: (|P1 P3| |P2 P4|) / (|P1 P4| |P2 P3|)
+    """
+    norms = _norms(landmarks[..., np.asarray(indices), :2], _CROSS_FIRST, _CROSS_SECOND)
+    return (norms[..., 0] * norms[..., 1]) / (norms[..., 2] * norms[..., 3])
+
+
+def five_point_cross_ratios(landmarks: np.ndarray, indices) -> np.ndarray:
+    """
+    Cross ratio of 5 coplanar points in the xy plane, invariant under projective transformations
+    :param indices: (K, 5) indices P1, P2, P3, P4, P5
+    :return: (det(P1, P2, P4) det(P1, P3, P5)) / (det(P1, P2, P5) det(P1, P3, P4))
+    """
+    determinants = _determinants(landmarks[..., np.asarray(indices), :2], _FIVE_POINT_FIRST, _FIVE_POINT_SECOND)
+    return (determinants[..., 0] * determinants[..., 1]) / (determinants[..., 2] * determinants[..., 3])
+
+
+def cross_cross_ratios(landmarks: np.ndarray, indices) -> np.ndarray:
+    """
+    Ratio of the five point cross ratios of (P1, P3, P4, P5, P6) and (P2, P3, P4, P5, P6)
+    :param indices: (K, 6) indices P1, P2, P3, P4, P5, P6
+    """
+    indices = np.asarray(indices)
+    ratios = five_point_cross_ratios(landmarks, np.concatenate((indices[:, [0, 2, 3, 4, 5]],
+                                                                indices[:, [1, 2, 3, 4, 5]])))
+    return ratios[..., :len(indices)] / ratios[..., len(indices):]
+
+
+def eye_aspect_ratios(landmarks: np.ndarray, indices) -> np.ndarray:
+    """
+    Eye aspect ratio. P1, P4 are the eye corners, P2 is opposite to P6 and P3 is opposite to P5.
+    :param indices: (K, 6) indices P1, P2, P3, P4, P5, P6
+    :return: (|P2 P6| + |P3 P5|) / (2 |P1 P4|)
+    """
+    norms = _norms(landmarks[..., np.asarray(indices), :], _EAR_FIRST, _EAR_SECOND)
+    return (norms[..., 0] + norms[..., 1]) / (2.0 * norms[..., 2])
+
+
+KERNELS = {
+    "distance_ratio": (distance_ratios, 4),
+    "cross_ratio": (cross_ratios, 4),
+    "five_point_cross_ratio": (five_point_cross_ratios, 5),
+    "cross_cross_ratio": (cross_cross_ratios, 6),
+    "eye_aspect_ratio": (eye_aspect_ratios, 6),
+}
+
+
+class FeatureTable:
+    """
+    Named features of the kinds in KERNELS that are evaluated together: the landmarks of all features are gathered
+    and scaled once and every kind of feature is computed with one call of its kernel.
+    usage: table.add("JawOpen", "distance_ratio", [1, 18, 10, 151]); values = table(landmarks, scale)
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._features: Dict[str, List] = {kind: [] for kind in KERNELS}
+        self._landmarks: Optional[np.ndarray] = None
+        self._tables = []
+
+    def add(self, name: str, kind: str, indices: Sequence[int]) -> int:
+        """
+        Adds a feature
+        :param name: name of the feature
+        :param kind: one of the keys of KERNELS
+        :param indices: landmark indices of the feature, see the kernel
+        :return: position of the feature in the result
+        """
+        kernel, size = KERNELS[kind]
+        if len(indices) != size:
+            raise ValueError(f"A {kind} needs {size} landmarks, got {len(indices)}")
+        self.names.append(name)
+        self._features[kind].append((len(self.names) - 1, list(indices)))
+        self._landmarks = None
+        return len(self.names) - 1
+
+    def index(self, name: str) -> int:
+        return self.names.index(name)
+
+    @property
+    def landmarks(self) -> np.ndarray:
+        """
+        Sorted indices of all landmarks the features depend on
+        """
+        if self._landmarks is None:
+            self._compile()
+        return self._landmarks
+
+    def _compile(self):
+        self._landmarks = np.unique([index for features in self._features.values()
+                                     for _, indices in features for index in indices]).astype(np.intp)
+        self._tables = []
+        for kind, features in self._features.items():
+            if features:
+                positions = np.array([position for position, _ in features], dtype=np.intp)
+                # indices into the gathered landmarks
+                local_indices = np.searchsorted(self._landmarks, [indices for _, indices in features])
+                self._tables.append((KERNELS[kind][0], positions, local_indices))
+
+    def __call__(self, landmarks: np.ndarray, scale=None) -> np.ndarray:
+        """
+        Computes all features
+        :param landmarks: (..., N, D) landmarks
+        :param scale: factor for the landmarks before computing the features, e.g. the frame size for normalized
+        landmarks
+        :return: (..., F) features in the order of names
+        """
+        points = landmarks[..., self.landmarks, :]
+        if scale is not None:
+            points = points * scale
+        result = np.empty(landmarks.shape[:-2] + (len(self.names),))
+        for kernel, positions, local_indices in self._tables:
+            result[..., positions] = kernel(points, local_indices)
+        return result
@@ -6,6 +6,8 @@
 # Code written by Pavlo Molchanov, Shalini De Mello.
 # --------------------------------------------------------
 
+from numbers import Number
+
 import numpy as np
 
 class Kalman1D(object):
@@ -37,3 +39,101 @@ class Kalman1D(object):
         self.P[k] = (1-self.K[k])*self.Pminus[k]
         self.k = self.k + 1
         return self.xhat[k]
+
+
+class KalmanBank(object):
+    """
+    Bank of independent Kalman1D filters, one per element of an array of the given shape.
+    All channels share R and Q, so the error estimate and gain are scalars and every update
+    is a handful of array operations. Only the current estimate is kept, there is no history.
+    """
+
+    def __init__(self, shape, R=0.001**2, Q=1e-5, dtype=np.float64):
+        self.Q = Q # process variance
+        self.R = R # estimate of measurement variance, change to see effect
+        self.xhat = np.zeros(shape, dtype=dtype) # a posteri estimate of x
+        self._residual = np.zeros(shape, dtype=dtype)
+        # intial guesses
+        self.P = 1.0 # a posteri error estimate
+        self.K = 0.0 # gain or blending factor
+
+    def reset(self):
+        self.xhat.fill(0.0)
+        self.P = 1.0
+
+    def update(self, val):
+        """
+        Updates all channels with the new measurements.
+        :param val: measurements, array with the shape of the bank
+        :return: the filtered values, the returned array is reused by the next update
+        """
+        Pminus = self.P + self.Q
+
+        # measurement update
+        self.K = Pminus/( Pminus+self.R )
+        np.subtract(val, self.xhat, out=self._residual)
+        self._residual *= self.K
+        self.xhat += self._residual
+        self.P = (1-self.K)*Pminus
+        return self.xhat
+
+
+class FilteredFloat:
+    def __init__(self, value: Number, filter_value: float = None):
+        if filter_value is None:
+            self.use_filter = False
+            self.filter_R = 0.
+        else:
+            self.use_filter = True
+            self.filter_R = filter_value
+        self.filter = Kalman1D(R=self.filter_R ** 2)
+        self.value = value
+
+    def set(self, value):
+        """
+        Adds a new value to be filtered and returns the filtered value
+        :param value: New value to be filtered
+        """
+        if self.use_filter:
+            kalman = self.filter.update(value)
+            self.value = np.real(kalman)
+        else:
+            self.value = value
+        return self.value
+
+    def get(self):
+        return self.value
+
+    def set_filter_value(self, filter_value):
+        self.filter_R = filter_value
+        self.use_filter = True
+        self.filter = Kalman1D(R=self.filter_R ** 2)
+
+
+class Filtered2D:
+    def __init__(self, value: np.ndarray((2,)), filter_value: float = None):
+        if filter_value is None:
+            self.use_filter = False
+            self.filter_R = 0.
+        else:
+            self.use_filter = True
+            self.filter_R = filter_value
+        self.filter = Kalman1D(R=self.filter_R ** 2)
+        self.value = value
+
+    def set(self, value):
+        if self.use_filter:
+            kalman = self.filter.update(value[0] + 1j * value[1])
+            self.value[0], self.value[1] = (np.real(kalman), np.imag(kalman))
+        else:
+            self.value = value
+
+    def get(self):
+        return self.value
+
+    def set_filter_value(self, filter_value):
+        if filter_value > 0:
+            self.use_filter = True
+            self.filter = Kalman1D(R=filter_value ** 2)
+        else:
+            self.use_filter = False
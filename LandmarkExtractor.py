@@ -0,0 +1,82 @@
+from typing import Optional
+
+import numpy as np
+
+# A NormalizedLandmarkList serializes to one length delimited record per landmark (field 1, tag 0x0a). Every record
+# holds fixed32 floats for x (tag 0x0d), y (0x15), z (0x1d) and optionally visibility (0x25) and presence (0x2d).
+# As long as all records have the same layout the serialized message can be viewed as a structured array.
+_XYZ_RECORD = np.dtype([("tag", "u1"), ("length", "u1"),
+                        ("x_tag", "u1"), ("x", "<f4"),
+                        ("y_tag", "u1"), ("y", "<f4"),
+                        ("z_tag", "u1"), ("z", "<f4")])
+_XYZVP_RECORD = np.dtype(_XYZ_RECORD.descr + [("visibility_tag", "u1"), ("visibility", "<f4"),
+                                              ("presence_tag", "u1"), ("presence", "<f4")])
+_RECORD_TYPES = {_XYZ_RECORD.itemsize - 2: _XYZ_RECORD, _XYZVP_RECORD.itemsize - 2: _XYZVP_RECORD}
+
+
+def _parse_serialized(data: bytes, num_landmarks: int) -> Optional[np.ndarray]:
+    """
+    Views serialized landmarks as structured records, returns None if the layout is not the expected one.
+    """
+    if num_landmarks == 0 or len(data) < 2:
+        return None
+    record_type = _RECORD_TYPES.get(data[1], None)
+    if record_type is None or len(data) != num_landmarks * record_type.itemsize:
+        return None
+    records = np.frombuffer(data, dtype=record_type)
+    valid = ((records["tag"] == 0x0a) & (records["length"] == data[1]) & (records["x_tag"] == 0x0d)
+             & (records["y_tag"] == 0x15) & (records["z_tag"] == 0x1d)).all()
+    return records if valid else None
+
+
+def landmarks_to_numpy(landmark_list, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Copies the x, y, z coordinates of a mediapipe NormalizedLandmarkList into a numpy array.
+    Uses the serialized protobuf message to copy all coordinates at once and falls back to reading
+    the landmarks one by one if the message layout is unexpected.
+    :param landmark_list: mediapipe landmark list, e.g. results.multi_face_landmarks[0]
+    :param out: optional (N, 3) array to write into, has to match the number of landmarks
+    :return: (N, 3) array with the landmark coordinates
+    """
+    landmarks = landmark_list.landmark
+    num_landmarks = len(landmarks)
+    if out is None:
+        out = np.empty((num_landmarks, 3))
+    assert out.shape == (num_landmarks, 3)
+
+    records = _parse_serialized(landmark_list.SerializeToString(), num_landmarks)
+    if records is not None:
+        out[:, 0] = records["x"]
+        out[:, 1] = records["y"]
+        out[:, 2] = records["z"]
+    else:
+        for i, lm in enumerate(landmarks):
+            out[i, 0] = lm.x
+            out[i, 1] = lm.y
+            out[i, 2] = lm.z
+    return out
+
+
+class LandmarkExtractor:
+    """
+    Extracts landmarks into a preallocated array that is reused every frame.
+    usage extractor = LandmarkExtractor(). Then call np_landmarks = extractor(landmarks) one time per frame
+    """
+
+    def __init__(self, num_landmarks: int = 478):
+        """
+        Constructor for the landmark extractor
+        Args:
+            num_landmarks: expected number of landmarks, 478 with refined landmarks, 468 without
+        """
+        self.landmarks = np.zeros((num_landmarks, 3))
+
+    def __call__(self, landmark_list) -> np.ndarray:
+        """
+        Extracts the landmarks of the given list.
+        Returns:
+                (N, 3) array with the landmark coordinates, the array is overwritten by the next call
+        """
+        if len(landmark_list.landmark) != self.landmarks.shape[0]:
+            self.landmarks = np.zeros((len(landmark_list.landmark), 3))
+        return landmarks_to_numpy(landmark_list, self.landmarks)
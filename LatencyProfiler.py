@@ -0,0 +1,161 @@
+import json
+import math
+import time
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+class Histogram:
+    """
+    Latency histogram with logarithmic bins, bins_per_octave bins per doubling starting at min_ns.
+    """
+
+    def __init__(self, min_ns: int = 1000, octaves: int = 24, bins_per_octave: int = 8):
+        self.min_ns = min_ns
+        self.bins_per_octave = bins_per_octave
+        self.counts = np.zeros(octaves * bins_per_octave + 1, dtype=np.int64)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, duration_ns: int):
+        if duration_ns > self.min_ns:
+            index = min(int(math.log2(duration_ns / self.min_ns) * self.bins_per_octave), len(self.counts) - 1)
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def percentile(self, q: float) -> float:
+        """
+        Returns the upper edge of the bin holding the q-th percentile in nanoseconds
+        :param q: percentile between 0 and 100
+        """
+        if self.count == 0:
+            return 0.
+        index = int(np.searchsorted(np.cumsum(self.counts), q / 100 * self.count))
+        return min(self.min_ns * 2 ** ((index + 1) / self.bins_per_octave), self.max_ns)
+
+    def reset(self):
+        self.counts.fill(0)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+
+class _Span:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profiler.record(self.name, time.perf_counter_ns() - self.start)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class LatencyProfiler:
+    """
+    Records the duration of named stages of the frame pipeline into preallocated histograms.
+    usage: with PROFILER.span("facemesh"): results = face_mesh.process(image)
+    When disabled, span returns a shared no-op context manager, so instrumentation can stay in the hot path.
+    Spans are reused per name, so a stage name must only be timed from one thread at a time.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.histograms: Dict[str, Histogram] = {}
+        self._spans: Dict[str, _Span] = {}
+
+    def span(self, name: str):
+        """
+        Context manager timing its body as stage name.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        span = self._spans.get(name, None)
+        if span is None:
+            span = self._spans[name] = _Span(self, name)
+        return span
+
+    def record(self, name: str, duration_ns: int):
+        """
+        Adds a measured duration to the histogram of stage name.
+        :param name: name of the stage
+        :param duration_ns: duration in nanoseconds, e.g. a difference of time.perf_counter_ns()
+        """
+        histogram = self.histograms.get(name, None)
+        if histogram is None:
+            # setdefault is atomic, two threads starting the same stage end up with one histogram
+            histogram = self.histograms.setdefault(name, Histogram())
+        histogram.add(duration_ns)
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+
+    def _items(self):
+        # stages are added by the threads that record them, so readers iterate over a copy
+        return list(self.histograms.items())
+
+    def reset(self):
+        for _, histogram in self._items():
+            histogram.reset()
+
+    def summary(self) -> Dict[str, Tuple[float, float, float]]:
+        """
+        Returns p50, p95 and p99 in milliseconds for every stage.
+        """
+        return {name: tuple(histogram.percentile(q) / 1e6 for q in (50, 95, 99))
+                for name, histogram in self._items()}
+
+    def format_summary(self) -> str:
+        """
+        One line summary "stage p50/p95/p99 ms" of every stage, e.g. for a status bar
+        """
+        return ", ".join(f"{name} {p50:.1f}/{p95:.1f}/{p99:.1f}"
+                         for name, (p50, p95, p99) in self.summary().items())
+
+    def dump(self) -> Dict[str, dict]:
+        """
+        Returns the statistics and raw histograms of all stages as a json serializable dict.
+        """
+        result = {}
+        for name, histogram in self._items():
+            p50, p95, p99 = (histogram.percentile(q) / 1e6 for q in (50, 95, 99))
+            result[name] = {
+                "count": histogram.count,
+                "mean_ms": histogram.total_ns / histogram.count / 1e6 if histogram.count else 0.,
+                "max_ms": histogram.max_ns / 1e6,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "min_ns": histogram.min_ns,
+                "bins_per_octave": histogram.bins_per_octave,
+                "counts": histogram.counts.tolist(),
+            }
+        return result
+
+    def dump_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.dump(), f, indent=2)
+
+
+PROFILER = LatencyProfiler()
@@ -0,0 +1,154 @@
+import struct
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from Signal import Signal
+from pyLiveLinkFace import FaceBlendShape, LiveLinkFaceDecoder
+
+
+class LiveLinkFaceDevice:
+    """
+    State of one LiveLinkFace sender (phone), identified by its subject uuid.
+    """
+
+    def __init__(self, uuid: str, name: str):
+        self.uuid = uuid
+        self.name = name
+        self.decoder = LiveLinkFaceDecoder()
+        self.signals: Optional[Dict[str, Signal]] = None  # own signal set with own filters, created on demand
+        self.last_packet = 0.
+        self.frames = 0
+
+    @property
+    def blend_shapes(self) -> np.ndarray:
+        return self.decoder.blend_shapes
+
+    def update_signals(self, filter_only: bool = False):
+        """
+        Sets the own signals of the device to the blend shapes of its last frame.
+        :param filter_only: If true, only update the filters of the signals, see Signal.update_filter
+        """
+        values = self.decoder.blend_shapes.tolist()
+        for name, signal in self.signals.items():
+            if filter_only:
+                signal.update_filter(values[FaceBlendShape[name].value])
+            else:
+                signal.set_value(values[FaceBlendShape[name].value])
+
+
+class LiveLinkFaceReceiver:
+    """
+    Demultiplexes LiveLinkFace packets of several phones on one port by their subject uuid and decides which
+    frames drive the output:
+        pinned_uuid set: only the frames of this device
+        fuse: the mean of the last frames of all devices that sent within device_timeout
+        otherwise: the first device that sends, until it is silent for device_timeout
+    Devices that are silent for forget_timeout are dropped when a new device shows up, so the device list does not
+    grow with every phone that ever sent.
+    """
+
+    def __init__(self, device_timeout: float = 1.0, forget_timeout: float = 60.0):
+        assert forget_timeout >= device_timeout
+        self.devices: Dict[bytes, LiveLinkFaceDevice] = {}
+        self.device_timeout = device_timeout
+        self.forget_timeout = forget_timeout
+        self.invalid_packets = 0  # datagrams that were no LiveLinkFace packets, e.g. truncated or foreign
+        self.pinned_uuid: Optional[str] = None
+        self.fuse = False
+        self.output_device: Optional[LiveLinkFaceDevice] = None
+        self.fused_blend_shapes = np.zeros(61, dtype=np.float32)
+
+    @staticmethod
+    def device_key(bytes_data) -> bytes:
+        """
+        Returns the subject uuid of a packet as bytes, the key of its device in devices.
+        """
+        return bytes(bytes_data[4:41])
+
+    def receive(self, bytes_data, now: Optional[float] = None) -> Optional[LiveLinkFaceDevice]:
+        """
+        Decodes a packet into the state of its device.
+        :param bytes_data: received bytes or memoryview
+        :param now: receive time in seconds (time.perf_counter), now if None
+        :return: the updated device or None if the packet did not contain a face or could not be decoded
+        """
+        key = self.device_key(bytes_data)
+        device = self.devices.get(key, None)
+        if device is None:
+            device = LiveLinkFaceDevice("", "")
+        try:
+            has_face = device.decoder.decode(bytes_data)
+        except (struct.error, ValueError):
+            # anyone can send to the port, a stray datagram must not stop the engine
+            self.invalid_packets += 1
+            return None
+        if not has_face:
+            return None
+        if now is None:
+            now = time.perf_counter()
+        if key not in self.devices:
+            device.uuid, device.name = device.decoder.uuid, device.decoder.name
+            self.forget_silent_devices(now)
+            self.devices[key] = device
+        device.last_packet = now
+        device.frames += 1
+        return device
+
+    def forget_silent_devices(self, now: float):
+        """
+        Drops the devices that did not send a face for forget_timeout seconds.
+        """
+        silent = [key for key, device in self.devices.items() if now - device.last_packet > self.forget_timeout]
+        for key in silent:
+            if self.devices.pop(key) is self.output_device:
+                self.output_device = None
+
+    def is_output(self, device: LiveLinkFaceDevice) -> bool:
+        """
+        Returns True if the last frame of device drives the output when not fusing.
+        """
+        if self.pinned_uuid is not None:
+            return device.uuid == self.pinned_uuid
+        output_device = self.output_device
+        if output_device is None or output_device is device or \
+                device.last_packet - output_device.last_packet > self.device_timeout:
+            self.output_device = device
+            return True
+        return False
+
+    def active_devices(self, now: Optional[float] = None) -> List[LiveLinkFaceDevice]:
+        """
+        Returns the devices that sent a face within device_timeout.
+        """
+        if now is None:
+            now = time.perf_counter()
+        return [device for device in self.devices.values() if now - device.last_packet <= self.device_timeout]
+
+    def fuse_blend_shapes(self, now: float) -> np.ndarray:
+        """
+        Averages the last frames of all active devices into the reused fused_blend_shapes array.
+        :param now: time of the newest frame in seconds (time.perf_counter)
+        """
+        devices = self.active_devices(now)
+        self.fused_blend_shapes.fill(0.)
+        for device in devices:
+            self.fused_blend_shapes += device.blend_shapes
+        if devices:
+            self.fused_blend_shapes /= len(devices)
+        return self.fused_blend_shapes
+
+    def set_pinned_device(self, uuid: Optional[str]):
+        """
+        Only uses the frames of one device for the output.
+        :param uuid: subject uuid of the device, with or without the leading $, or None to follow the first device
+        """
+        if uuid is not None and not uuid.startswith("$"):
+            uuid = "$" + uuid
+        self.pinned_uuid = uuid
+
+    def reset(self):
+        self.devices.clear()
+        self.output_device = None
+        self.invalid_packets = 0
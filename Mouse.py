@@ -24,6 +24,10 @@ class MouseMode(Enum):
 
 
 class Mouse:
+    # signals read by process_signal
+    updown_signal = "HeadPitch"
+    leftright_signal = "HeadYaw"
+
     def __init__(self):
         self.x = 0
         self.y = 0
@@ -115,10 +119,8 @@ class Mouse:
 
     def process_signal(self, signals):
         # TODO: move this around, possibilities: MosueAction / select signals in demo / select signals in mouse
-        updown = "HeadPitch"
-        leftright = "HeadYaw"
-        pitch = (1 - signals[updown].scaled_value)
-        yaw = (1 - signals[leftright].scaled_value)
+        pitch = (1 - signals[self.updown_signal].scaled_value)
+        yaw = (1 - signals[self.leftright_signal].scaled_value)
         self.move(pitch, yaw)
 
     def enable_gesture(self):
@@ -0,0 +1,86 @@
+import numpy as np
+
+
+class PlotBuffer:
+    """
+    Preallocated history of sampled lines for plotting, e.g. the signals of a SignalVis.
+    Every sample is written twice, at i and i + history, so the last history samples are always one contiguous slice
+    and x / line() return views that can be handed to pyqtgraph without copying or converting.
+    usage: buffer.push(time, values), then plot buffer.x against buffer.line(column)
+    """
+
+    def __init__(self, history: int = 100, columns: int = 0):
+        """
+        Constructor for the plot buffer
+        :param history: number of samples that are kept
+        :param columns: number of lines
+        """
+        assert history > 0
+        self.history = history
+        self.count = 0
+        self._x = np.zeros(2 * history)
+        self._values = np.zeros((columns, 2 * history))
+
+    @property
+    def columns(self) -> int:
+        return self._values.shape[0]
+
+    def add_column(self) -> int:
+        """
+        Adds a line whose history is 0
+        :return: column of the line
+        """
+        self._values = np.concatenate((self._values, np.zeros((1, 2 * self.history))))
+        return self.columns - 1
+
+    def push(self, x: float, values):
+        """
+        Appends a sample to every line, overwrites the oldest sample when the history is full.
+        :param x: x value of the sample, e.g. its time
+        :param values: one value per column
+        """
+        i = self.count % self.history
+        self._x[i] = self._x[i + self.history] = x
+        self._values[:, i] = self._values[:, i + self.history] = values
+        self.count += 1
+
+    @property
+    def length(self) -> int:
+        """
+        Number of samples in the history
+        """
+        return min(self.count, self.history)
+
+    def _window(self) -> slice:
+        end = (self.count - 1) % self.history + self.history + 1
+        return slice(end - self.length, end)
+
+    @property
+    def x(self) -> np.ndarray:
+        """
+        x values of the history, oldest first, a view that changes with the next push
+        """
+        return self._x[self._window()]
+
+    def line(self, column: int) -> np.ndarray:
+        """
+        Values of a line, oldest first, a view that changes with the next push
+        """
+        return self._values[column, self._window()]
+
+    def set_history(self, history: int):
+        """
+        Changes the number of kept samples, keeps the newest samples that fit
+        """
+        assert history > 0
+        length = min(self.length, history)
+        x, values = self.x[self.length - length:], self._values[:, self._window()][:, self.length - length:]
+        self.history = history
+        self._x = np.zeros(2 * history)
+        self._values = np.zeros((self.columns, 2 * history))
+        self.count = 0
+        for i in range(length):
+            self.push(x[i], values[:, i])
+
+    def clear(self):
+        self.count = 0
@@ -0,0 +1,161 @@
+"""
+Recording and replay of tracking sessions.
+
+A recording is a directory with one frame per row in plain .npy files, so it can be memory-mapped with
+np.load(..., mmap_mode="r"):
+    timestamps.npy      (T,) float64, seconds since the first frame
+    landmarks.npy       (T, 478, 3) float32, normalized mediapipe landmarks (webcam sessions)
+    packets.npy         (T, 1024) uint8, raw LiveLinkFace UDP packets (iPhone sessions)
+    packet_lengths.npy  (T,) uint16, valid bytes of every packet
+"""
+import os
+import struct
+import time
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+MAX_PACKET_SIZE = 1024
+
+
+class NpyStreamWriter:
+    """
+    Appends frames to a .npy file without knowing the number of frames in advance.
+    The header reserves a fixed width for the first axis and is rewritten on close.
+    """
+
+    def __init__(self, path: str, dtype, frame_shape: Tuple[int, ...]):
+        self.dtype = np.dtype(dtype)
+        self.frame_shape = tuple(frame_shape)
+        self.length = 0
+        self.file = open(path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        shape = f"({self.length:20d}," + "".join(f" {dim}," for dim in self.frame_shape) + ")"
+        header = f"{{'descr': {self.dtype.str!r}, 'fortran_order': False, 'shape': {shape}, }}"
+        # magic (6) + version (2) + header length (2) + header + newline is padded to a multiple of 64
+        padding = 63 - (10 + len(header)) % 64
+        header = (header + " " * padding + "\n").encode("latin1")
+        self.file.seek(0)
+        self.file.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header)
+
+    def write(self, frame: np.ndarray):
+        """
+        Appends one frame, the frame is converted to the dtype of the file
+        :param frame: array with frame_shape
+        """
+        self.file.write(np.ascontiguousarray(frame, dtype=self.dtype).tobytes())
+        self.length += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        self._write_header()
+        self.file.close()
+
+
+class SessionRecorder:
+    """
+    Records landmarks or LiveLinkFace packets of a session into a recording directory.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.start_time: Optional[float] = None
+        self.timestamps = NpyStreamWriter(os.path.join(path, "timestamps.npy"), np.float64, ())
+        self.landmarks: Optional[NpyStreamWriter] = None
+        self.packets: Optional[NpyStreamWriter] = None
+        self.packet_lengths: Optional[NpyStreamWriter] = None
+        self._packet_buffer = np.zeros(MAX_PACKET_SIZE, dtype=np.uint8)
+
+    def _write_timestamp(self, timestamp: Optional[float]):
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if self.start_time is None:
+            self.start_time = timestamp
+        self.timestamps.write(np.float64(timestamp - self.start_time))
+
+    def record_landmarks(self, landmarks: np.ndarray, timestamp: Optional[float] = None):
+        """
+        Records the landmarks of one frame
+        :param landmarks: (N, 3) normalized landmarks
+        :param timestamp: time of the frame in seconds (time.perf_counter), now if None
+        """
+        assert self.packets is None, "A recording holds either landmarks or packets"
+        if self.landmarks is None:
+            self.landmarks = NpyStreamWriter(os.path.join(self.path, "landmarks.npy"), np.float32, landmarks.shape)
+        self.landmarks.write(landmarks)
+        self._write_timestamp(timestamp)
+
+    def record_packet(self, data: bytes, timestamp: Optional[float] = None):
+        """
+        Records one raw LiveLinkFace packet
+        :param data: received bytes, at most MAX_PACKET_SIZE
+        :param timestamp: time of the packet in seconds (time.perf_counter), now if None
+        """
+        assert self.landmarks is None, "A recording holds either landmarks or packets"
+        if self.packets is None:
+            self.packets = NpyStreamWriter(os.path.join(self.path, "packets.npy"), np.uint8, (MAX_PACKET_SIZE,))
+            self.packet_lengths = NpyStreamWriter(os.path.join(self.path, "packet_lengths.npy"), np.uint16, ())
+        length = min(len(data), MAX_PACKET_SIZE)
+        self._packet_buffer[:length] = np.frombuffer(data, dtype=np.uint8, count=length)
+        self._packet_buffer[length:] = 0
+        self.packets.write(self._packet_buffer)
+        self.packet_lengths.write(np.uint16(length))
+        self._write_timestamp(timestamp)
+
+    def close(self):
+        for writer in (self.landmarks, self.packets, self.packet_lengths, self.timestamps):
+            if writer is not None:
+                writer.close()
+
+
+class SessionReplay:
+    """
+    Memory-mapped recording that yields its frames at the original speed or as fast as possible.
+    A session that was stopped before its first frame has neither landmarks nor packets and replays no frames.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.timestamps = np.load(os.path.join(path, "timestamps.npy"), mmap_mode="r")
+        self.landmarks = None
+        self.packets = None
+        self.packet_lengths = None
+        if os.path.exists(os.path.join(path, "landmarks.npy")):
+            self.landmarks = np.load(os.path.join(path, "landmarks.npy"), mmap_mode="r")
+        elif os.path.exists(os.path.join(path, "packets.npy")):
+            self.packets = np.load(os.path.join(path, "packets.npy"), mmap_mode="r")
+            self.packet_lengths = np.load(os.path.join(path, "packet_lengths.npy"), mmap_mode="r")
+
+    @property
+    def has_landmarks(self) -> bool:
+        return self.landmarks is not None
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def frame(self, index: int):
+        """
+        Returns the landmarks ((N, 3) float32 view) or the packet (bytes) of the frame with the given index.
+        """
+        if self.landmarks is not None:
+            return self.landmarks[index]
+        return self.packets[index, :self.packet_lengths[index]].tobytes()
+
+    def frames(self, realtime: bool = False) -> Iterator[Tuple[float, object]]:
+        """
+        Iterates over all frames.
+        :param realtime: If true, waits between frames to reproduce the recorded timing
+        :return: iterator of (timestamp, frame)
+        """
+        start = time.perf_counter()
+        for index in range(len(self)):
+            timestamp = float(self.timestamps[index])
+            if realtime:
+                delay = timestamp - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            yield timestamp, self.frame(index)
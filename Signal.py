@@ -1,10 +1,6 @@
-import pickle
-
-from SignalsCalculator import FilteredFloat
-import keyboard
+from KalmanFilter1D import FilteredFloat
 from typing import Callable, Dict
 import uuid
-import mouse
 import time
 
 
@@ -169,6 +165,14 @@ class Signal:
         for action in self.actions.values():
             action.update(self.scaled_value)
 
+    def update_filter(self, value):
+        """
+        Only feeds the value into the filter, without scaling and without updating the actions.
+        Used for frames that are already superseded by a newer frame, e.g. in a burst of packets.
+        :param value: new value of signal
+        """
+        self.raw_value.set(value)
+
     def set_threshold(self, lower_threshold: float, higher_threshold: float):
         """
         Sets the lower and higher threshold. Keeps the old threshold if lower or higher threshold is None
@@ -1,78 +1,17 @@
-import DrawingDebug
 from PnPHeadPose import PnPHeadPose
+import GeometricFeatures
 from face_geometry import PCF, get_metric_landmarks
-import monitor
-import KalmanFilter1D
+from KalmanFilter1D import FilteredFloat, Filtered2D
+from LatencyProfiler import PROFILER
 
 from scipy.spatial.transform import Rotation
 import numpy as np
 import cv2
 
+import multiprocessing
+import threading
 from dataclasses import dataclass, fields
-from typing import Tuple
-from numbers import Number
-from face_geometry import PCF, get_metric_landmarks
-
-
-class FilteredFloat:
-    def __init__(self, value: Number, filter_value: float = None):
-        if filter_value is None:
-            self.use_filter = False
-            self.filter_R = 0.
-        else:
-            self.use_filter = True
-            self.filter_R = filter_value
-        self.filter = KalmanFilter1D.Kalman1D(R=self.filter_R ** 2)
-        self.value = value
-
-    def set(self, value):
-        """
-        Adds a new value to be filtered and returns the filtered value
-        :param value: New value to be filtered
-        """
-        if self.use_filter:
-            kalman = self.filter.update(value)
-            self.value = np.real(kalman)
-        else:
-            self.value = value
-        return self.value
-
-    def get(self):
-        return self.value
-
-    def set_filter_value(self, filter_value):
-        self.filter_R = filter_value
-        self.use_filter = True
-        self.filter = KalmanFilter1D.Kalman1D(R=self.filter_R ** 2)
-
-
-class Filtered2D:
-    def __init__(self, value: np.ndarray((2,)), filter_value: float = None):
-        if filter_value is None:
-            self.use_filter = False
-            self.filter_R = 0.
-        else:
-            self.use_filter = True
-            self.filter_R = filter_value
-        self.filter = KalmanFilter1D.Kalman1D(R=self.filter_R ** 2)
-        self.value = value
-
-    def set(self, value):
-        if self.use_filter:
-            kalman = self.filter.update(value[0] + 1j * value[1])
-            self.value[0], self.value[1] = (np.real(kalman), np.imag(kalman))
-        else:
-            self.value = value
-
-    def get(self):
-        return self.value
-
-    def set_filter_value(self, filter_value):
-        if filter_value > 0:
-            self.use_filter = True
-            self.filter = KalmanFilter1D.Kalman1D(R=filter_value ** 2)
-        else:
-            self.use_filter = False
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 
 @dataclass
@@ -105,60 +44,313 @@ class SignalsResult:
         self.screen_xy = Filtered2D(np.zeros((2,)))
 
 
+@dataclass(frozen=True)
+class DerivedSignal:
+    """
+    Signal that is computed from the landmarks of a frame.
+    landmarks: indices of the landmarks that compute reads from FrameCache.pixels, empty for signals that only use
+    the head pose
+    compute: function of the FrameCache of the frame, returns the value of the signal
+    """
+    landmarks: Tuple[int, ...]
+    compute: Callable[["FrameCache"], float]
+
+
+class FrameCache:
+    """
+    Intermediate results of one frame that are shared by the signals. The head pose, everything derived from it and
+    the geometric features are computed on first use, pixels only holds the landmarks the requested signals depend on.
+    """
+
+    def __init__(self, calculator: "SignalsCalculater"):
+        self.calculator = calculator
+        self.landmarks: Optional[np.ndarray] = None
+        self.pixels = np.zeros((478, 3))
+        self._pose = None
+        self._rotation = None
+        self._angles = None
+        self._features = None
+
+    def reset(self, landmarks: np.ndarray, indices: np.ndarray):
+        """
+        Starts a new frame
+        :param landmarks: (478, 3) normalized landmarks
+        :param indices: indices of the landmarks that are converted to pixels
+        """
+        self.landmarks = landmarks
+        frame_size = self.calculator.frame_size
+        self.pixels[indices] = landmarks[indices] * (frame_size[0], frame_size[1], frame_size[0])
+        self._pose = None
+        self._rotation = None
+        self._angles = None
+        self._features = None
+
+    @property
+    def features(self) -> np.ndarray:
+        """
+        All features of calculator.features, computed in one pass
+        """
+        if self._features is None:
+            frame_size = self.calculator.frame_size
+            self._features = self.calculator.features(self.landmarks, (frame_size[0], frame_size[1], frame_size[0]))
+        return self._features
+
+    @property
+    def pose(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._pose is None:
+            with PROFILER.span("pose"):
+                self._pose = self.calculator.pnp_head_pose(self.landmarks)
+            self.calculator.result.rvec, self.calculator.result.tvec = self._pose
+        return self._pose
+
+    @property
+    def cached_pose(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        rvec and tvec if a signal of this frame needed the head pose, None otherwise. Never fits the pose.
+        """
+        return self._pose
+
+    @property
+    def rotation(self) -> Rotation:
+        if self._rotation is None:
+            rvec, tvec = self.pose
+            self._rotation = Rotation.from_rotvec(np.squeeze(rvec))
+            self.calculator.result.nosetip = self._rotation.as_matrix() @ \
+                self.calculator.head_pose_calculator.canonical_metric_landmarks[1, :] + tvec.squeeze()
+        return self._rotation
+
+    @property
+    def angles(self) -> np.ndarray:
+        """
+        pitch, yaw and roll in degrees
+        """
+        if self._angles is None:
+            self._angles = self.rotation.as_euler("xyz", degrees=True)
+            self.calculator.result.pitch.set(self._angles[0])
+            self.calculator.result.yaw.set(self._angles[1])
+            self.calculator.result.roll.set(self._angles[2])
+        return self._angles
+
+
+class BatchFrameCache(FrameCache):
+    """
+    FrameCache of a chunk of frames for SignalsCalculater.process_batch. Every intermediate result has the frames as
+    its last axis, so element access of a signal, e.g. frame.features[3] or frame.pixels[1, 0], yields the values of
+    all frames. The head pose is fitted frame by frame with an own PnPHeadPose, so the pose tracking of the
+    calculator is not touched, everything else is vectorized.
+    """
+
+    def __init__(self, calculator: "SignalsCalculater"):
+        super().__init__(calculator)
+        head_pose = calculator.head_pose_calculator
+        self.head_pose_calculator = PnPHeadPose(head_pose.tracking, head_pose.max_reprojection_error,
+                                                head_pose.max_rotation_jump, head_pose.max_translation_jump)
+
+    def reset(self, landmarks: np.ndarray, indices: np.ndarray):
+        """
+        Starts a new chunk
+        :param landmarks: (T, 478, 3) normalized landmarks
+        :param indices: indices of the landmarks that are converted to pixels
+        """
+        self.landmarks = landmarks
+        frame_size = self.calculator.frame_size
+        self.pixels = np.zeros(landmarks.shape[1:] + landmarks.shape[:1])
+        self.pixels[indices] = np.moveaxis(landmarks[:, indices] * (frame_size[0], frame_size[1], frame_size[0]), 0, -1)
+        self._pose = None
+        self._rotation = None
+        self._angles = None
+        self._features = None
+
+    @property
+    def features(self) -> np.ndarray:
+        if self._features is None:
+            frame_size = self.calculator.frame_size
+            self._features = self.calculator.features(self.landmarks, (frame_size[0], frame_size[1], frame_size[0])).T
+        return self._features
+
+    @property
+    def pose(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (3, T) rotation vectors and translations
+        """
+        if self._pose is None:
+            rvecs = np.zeros((3, len(self.landmarks)))
+            tvecs = np.zeros((3, len(self.landmarks)))
+            for i, landmarks in enumerate(self.landmarks):
+                rvec, tvec = self.calculator.pnp_head_pose(landmarks, self.head_pose_calculator)
+                rvecs[:, i] = np.squeeze(rvec)
+                tvecs[:, i] = np.squeeze(tvec)
+            self._pose = rvecs, tvecs
+        return self._pose
+
+    @property
+    def rotation(self) -> Rotation:
+        if self._rotation is None:
+            self._rotation = Rotation.from_rotvec(self.pose[0].T)
+        return self._rotation
+
+    @property
+    def angles(self) -> np.ndarray:
+        if self._angles is None:
+            self._angles = self.rotation.as_euler("xyz", degrees=True).T
+        return self._angles
+
+
+# calculator and landmarks of process_batch in a worker process, set by _init_batch_worker
+_batch_job = None
+
+
+def _init_batch_worker(calculator: "SignalsCalculater", landmarks: np.ndarray, names: Tuple[str, ...]):
+    # runs in the forked worker, the arguments are inherited and not pickled
+    global _batch_job
+    _batch_job = (calculator, landmarks, names)
+
+
+def _process_batch_chunk(bounds: Tuple[int, int]) -> np.ndarray:
+    calculator, landmarks, names = _batch_job
+    return calculator.process_chunk(landmarks[bounds[0]:bounds[1]], names)
+
+
 class SignalsCalculater:
-    def __init__(self, camera_parameters, frame_size: Tuple[int, int]):
+    def __init__(self, camera_parameters, frame_size: Tuple[int, int], pose_tracking: bool = False):
         self.result = SignalsResult()
         self.neutral_landmarks = np.zeros((478, 3))
         self.camera_parameters = camera_parameters
-        self.head_pose_calculator = PnPHeadPose()
+        self.head_pose_calculator = PnPHeadPose(tracking=pose_tracking)
         self.pcf = PCF(1, 10000, 720, 1280)
         self.frame_size = frame_size
 
-    def process(self, landmarks):
-        rvec, tvec = self.pnp_head_pose(landmarks)
-        landmarks = landmarks * np.array((self.frame_size[0], self.frame_size[1], self.frame_size[0]))  # TODO: maybe move denormalization into methods
-        r = Rotation.from_rotvec(np.squeeze(rvec))
-
-        rotationmat = r.as_matrix()
-        angles = r.as_euler("xyz", degrees=True)
-        # normalized_landmarks = rotationmat.T@(landmarks-tvec.T)
-        self.result.rvec = rvec  # TODO: result not needed anymore
-        self.result.tvec = tvec
-        self.result.yaw.set(angles[1])
-        self.result.pitch.set(angles[0])
-        self.result.roll.set(angles[2])
-        self.result.nosetip = rotationmat @ self.head_pose_calculator.canonical_metric_landmarks[1, :] + tvec.squeeze()
-        jaw_open = self.get_jaw_open(landmarks)
-        self.result.jaw_open.set(jaw_open)
-        mouth_puck = self.get_mouth_puck(landmarks)
-        self.result.mouth_puck.set(mouth_puck)
-        l_brow_outer_up = self.cross_ratio_colinear(landmarks, [225, 46, 70, 71])
-        r_brow_outer_up = self.cross_ratio_colinear(landmarks, [445, 276, 300, 301])
-        brow_inner_up = self.five_point_cross_ratio(landmarks, [9, 69, 299, 65, 295])
-        l_smile = self.cross_cross_ratio(landmarks, [216, 207, 214, 212, 206, 92])
-        r_smile = self.cross_cross_ratio(landmarks, [436, 427, 434, 432, 426, 322])
-        smile = 0.5 * (l_smile+r_smile)
-        signals = {
-            "HeadPitch": angles[0],
-            "HeadYaw": angles[1],
-            "HeadRoll": angles[2],
-            "JawOpen": jaw_open,
-            "MouthPuck": mouth_puck,
-            "BrowOuterUpLeft": l_brow_outer_up,
-            "BrowOuterUpRight": r_brow_outer_up,
-            "BrowInnerUp": brow_inner_up,
-            "BrowInnerDown": brow_inner_up,
-            "MouthSmile": smile
-        }
-
-        return signals
+        self.features = GeometricFeatures.FeatureTable()
+        self.frame = FrameCache(self)
+        self.signals: Dict[str, DerivedSignal] = {}
+        self._landmark_indices: Dict[Tuple[str, ...], np.ndarray] = {}
+        self.register_default_signals()
+
+    def register_signal(self, name: str, landmarks: Iterable[int], compute: Callable[[FrameCache], float]):
+        """
+        Adds a signal or replaces the signal with the same name.
+        :param name: name of the signal
+        :param landmarks: indices of the landmarks compute reads from frame.pixels
+        :param compute: function of the FrameCache of a frame returning the value of the signal. For process_batch it
+        gets a BatchFrameCache, whose arrays have the frames as last axis, and has to return the values of all frames.
+        Element access like frame.features[i] or frame.pixels[1, 0] and arithmetic work for both.
+        """
+        self.signals[name] = DerivedSignal(tuple(landmarks), compute)
+        self._landmark_indices.clear()
+
+    def register_feature_signal(self, name: str, kind: str, indices: Iterable[int]):
+        """
+        Adds a signal that is a geometric feature, see GeometricFeatures.KERNELS. All feature signals of a frame are
+        computed together in one pass.
+        :param name: name of the signal
+        :param kind: kind of the feature, e.g. "cross_ratio"
+        :param indices: landmark indices of the feature
+        """
+        position = self.features.add(name, kind, list(indices))
+        self.register_signal(name, (), lambda frame: frame.features[position])
+
+    def register_default_signals(self):
+        self.register_signal("HeadPitch", (), lambda frame: frame.angles[0])
+        self.register_signal("HeadYaw", (), lambda frame: frame.angles[1])
+        self.register_signal("HeadRoll", (), lambda frame: frame.angles[2])
+
+        self.register_feature_signal("JawOpen", "distance_ratio", [1, 18, 10, 151])
+        self.register_feature_signal("MouthPuck", "distance_ratio", [302, 72, 151, 10])
+        self.register_feature_signal("BrowOuterUpLeft", "cross_ratio", [225, 46, 70, 71])
+        self.register_feature_signal("BrowOuterUpRight", "cross_ratio", [445, 276, 300, 301])
+        self.register_feature_signal("BrowInnerUp", "five_point_cross_ratio", [9, 69, 299, 65, 295])
+        self.register_signal("BrowInnerDown", (), self.signals["BrowInnerUp"].compute)
+        smile_left = self.features.add("MouthSmileLeft", "cross_cross_ratio", [216, 207, 214, 212, 206, 92])
+        smile_right = self.features.add("MouthSmileRight", "cross_cross_ratio", [436, 427, 434, 432, 426, 322])
+        self.register_signal("MouthSmile", (),
+                             lambda frame: 0.5 * (frame.features[smile_left] + frame.features[smile_right]))
+
+    def landmark_indices(self, names: Tuple[str, ...]) -> np.ndarray:
+        """
+        Returns the sorted indices of all landmarks the given signals depend on.
+        """
+        indices = self._landmark_indices.get(names, None)
+        if indices is None:
+            indices = sorted({index for name in names if name in self.signals for index in self.signals[name].landmarks})
+            indices = self._landmark_indices[names] = np.array(indices, dtype=np.intp)
+        return indices
+
+    def process(self, landmarks, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Computes signals of one frame, intermediate results like the head pose are only computed if a requested
+        signal needs them.
+        :param landmarks: (478, 3) normalized landmarks
+        :param names: names of the signals to compute, all registered signals if None. Unknown names are skipped.
+        :return: dict of signal name and value
+        """
+        names = tuple(self.signals) if names is None else tuple(names)
+        self.frame.reset(landmarks, self.landmark_indices(names))
+        return {name: self.signals[name].compute(self.frame) for name in names if name in self.signals}
+
+    def process_chunk(self, landmarks: np.ndarray, names: Tuple[str, ...]) -> np.ndarray:
+        """
+        Computes signals of consecutive frames, the pose tracking starts from scratch and leaves the pose tracking of
+        process() alone.
+        :param landmarks: (T, 478, 3) normalized landmarks
+        :param names: names of registered signals
+        :return: (T, len(names)) signals
+        """
+        frame = BatchFrameCache(self)
+        frame.reset(np.asarray(landmarks, dtype=np.float64), self.landmark_indices(names))
+        result = np.empty((len(landmarks), len(names)))
+        for column, name in enumerate(names):
+            result[:, column] = self.signals[name].compute(frame)
+        return result
+
+    def process_batch(self, landmarks: np.ndarray, names: Optional[Iterable[str]] = None, chunk_size: int = 1024,
+                      processes: Optional[int] = None) -> np.ndarray:
+        """
+        Computes signals of a whole recording, e.g. to tune thresholds offline. The frames are processed in chunks,
+        only one chunk per process is loaded into memory at a time.
+        The head pose is tracked within a chunk only, so the result does not depend on the number of processes.
+        :param landmarks: (T, 478, 3) normalized landmarks, e.g. the memory-mapped landmarks of a SessionReplay
+        :param names: names of the signals to compute (the columns), all registered signals if None. Unknown names
+        are skipped.
+        :param chunk_size: number of frames per chunk
+        :param processes: number of worker processes, None or 1 to compute in this process. The workers are forked,
+        because registered signals are usually lambdas that cannot be pickled for spawned processes. Forking is only
+        safe in a process without other threads, so while other threads run (e.g. in the GUI with Qt, capture and
+        preview threads) and where fork is not available (Windows), the frames are computed in this process.
+        :return: (T, len(names)) signals
+        """
+        names = self.batch_signal_names(names)
+        chunks = [(start, min(start + chunk_size, len(landmarks))) for start in range(0, len(landmarks), chunk_size)]
+        if processes is None or processes <= 1 or len(chunks) <= 1 or threading.active_count() > 1 or \
+                "fork" not in multiprocessing.get_all_start_methods():
+            results = [self.process_chunk(landmarks[start:stop], names) for start, stop in chunks]
+        else:
+            with multiprocessing.get_context("fork").Pool(processes, _init_batch_worker,
+                                                          (self, landmarks, names)) as pool:
+                results = pool.map(_process_batch_chunk, chunks)
+        if not results:
+            return np.zeros((0, len(names)))
+        return np.concatenate(results)
+
+    def batch_signal_names(self, names: Optional[Iterable[str]] = None) -> Tuple[str, ...]:
+        """
+        Returns the names of the columns of process_batch for the given names
+        """
+        if names is None:
+            return tuple(self.signals)
+        return tuple(name for name in names if name in self.signals)
 
     def process_neutral(self, landmarks):
         pass
 
-    def pnp_head_pose(self, landmarks):
+    def pnp_head_pose(self, landmarks, head_pose_calculator: Optional[PnPHeadPose] = None):
+        """
+        Fits the head pose of one frame
+        :param head_pose_calculator: PnPHeadPose whose tracking state is used, head_pose_calculator if None
+        """
+        if head_pose_calculator is None:
+            head_pose_calculator = self.head_pose_calculator
         screen_landmarks = landmarks[:, :2] * np.array(self.frame_size)
-        rvec, tvec = self.head_pose_calculator.fit_func(screen_landmarks, self.camera_parameters)
+        rvec, tvec = head_pose_calculator.fit_func(screen_landmarks, self.camera_parameters)
         return rvec, tvec
 
     def pnp_reference_free(self, landmarks):
@@ -207,19 +399,11 @@ class SignalsCalculater:
         return rvec.as_rotvec(), translation
 
     def get_jaw_open(self, landmarks):
-        mouth_distance = np.linalg.norm(landmarks[14, :] - landmarks[13, :])
-        nose_tip = landmarks[1, :]
-        chin_moving_landmark = landmarks[18, :]
-        head_height = np.linalg.norm(landmarks[10, :] - landmarks[151, :])
-        jaw_nose_distance = np.linalg.norm(nose_tip - chin_moving_landmark)
-        normalized_distance = jaw_nose_distance / head_height
-        return normalized_distance
+        # distance of nose tip and chin normalized by the head height
+        return GeometricFeatures.distance_ratios(landmarks, [[1, 18, 10, 151]])[..., 0]
 
     def get_mouth_puck(self, landmarks):
-        left_distance = np.linalg.norm(landmarks[302] - landmarks[72])
-        d = np.linalg.norm(landmarks[151, :] - landmarks[10, :])
-        normalized_distance = left_distance / d
-        return normalized_distance
+        return GeometricFeatures.distance_ratios(landmarks, [[302, 72, 151, 10]])[..., 0]
 
     def cross_ratio_colinear(self, landmarks, indices):
         """
@@ -229,8 +413,7 @@ class SignalsCalculater:
         :return: cross_ratio of the 4 points (is invariant under projective transformations
         """
         assert len(indices) == 4
-        p1, p2, p3, p4 = landmarks[indices, :2]
-        return (np.linalg.norm(p3 - p1) * np.linalg.norm(p4 - p2)) / (np.linalg.norm(p4 - p1) * np.linalg.norm(p3 - p2))
+        return GeometricFeatures.cross_ratios(landmarks, [indices])[..., 0]
 
     def five_point_cross_ratio(self, landmarks, indices):
         """
@@ -240,25 +423,7 @@ class SignalsCalculater:
         :return: cross_ratio of the 5 points (is invariant under projective transformations
         """
         assert len(indices) == 5
-        p1, p2, p3, p4, p5 = landmarks[indices, :2]
-        m124 = np.ones((3, 3))
-        m124[:2, 0] = p1
-        m124[:2, 1] = p2
-        m124[:2, 2] = p4
-        m135 = np.ones((3, 3))
-        m135[:2, 0] = p1
-        m135[:2, 1] = p3
-        m135[:2, 2] = p5
-        m125 = np.ones((3, 3))
-        m125[:2, 0] = p1
-        m125[:2, 1] = p2
-        m125[:2, 2] = p5
-        m134 = np.ones((3, 3))
-        m134[:2, 0] = p1
-        m134[:2, 1] = p3
-        m134[:2, 2] = p4
-
-        return (np.linalg.det(m124) * np.linalg.det(m135)) / (np.linalg.det(m125) * np.linalg.det(m134))
+        return GeometricFeatures.five_point_cross_ratios(landmarks, [indices])[..., 0]
 
     def cross_cross_ratio(self, landmarks, indices):
         """
@@ -268,9 +433,7 @@ class SignalsCalculater:
         :return: cross cross ratio
         """
         assert len(indices) == 6
-
-        return self.five_point_cross_ratio(landmarks, [indices[0]] + indices[2:6]) / self.five_point_cross_ratio(
-            landmarks, [indices[1]] + indices[2:6])
+        return GeometricFeatures.cross_cross_ratios(landmarks, [indices])[..., 0]
 
     def eye_aspect_ratio(self, landmarks, indices):
         """
@@ -284,10 +447,7 @@ class SignalsCalculater:
         :return: ear = (P2_P6 + P3_P5) / (2.0 * P1_P4)
         """
         assert len(indices) == 6
-        p2_p6 = np.linalg.norm(landmarks[1]-landmarks[5])
-        p3_p5 = np.linalg.norm(landmarks[2]-landmarks[4])
-        p1_p4 = np.linalg.norm(landmarks[0]-landmarks[3])
-        return (p2_p6 + p3_p5) / (2.0 * p1_p4)
+        return GeometricFeatures.eye_aspect_ratios(landmarks, [indices])[..., 0]
 
     def set_filter_value(self, field_name: str, filter_value: float):
         signal = getattr(self.result, field_name, None)
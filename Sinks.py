@@ -0,0 +1,46 @@
+import csv
+import sys
+import time
+from typing import Dict, List, Optional, TextIO
+
+from Signal import Signal
+
+
+class PrintSink:
+    """
+    Prints the scaled signal values at most every interval seconds.
+    """
+
+    def __init__(self, interval: float = 1.0, stream: TextIO = sys.stdout):
+        self.interval = interval
+        self.stream = stream
+        self.last_print = 0.
+
+    def __call__(self, signals: Dict[str, Signal]):
+        now = time.perf_counter()
+        if now - self.last_print < self.interval:
+            return
+        self.last_print = now
+        values = ", ".join(f"{name}: {signal.scaled_value:.3f}" for name, signal in signals.items())
+        print(values, file=self.stream)
+
+
+class CsvSink:
+    """
+    Writes one row per frame with a timestamp and the scaled value of every signal.
+    The header is written with the first frame, the columns are the signals present at that time.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.signal_names: Optional[List[str]] = None
+
+    def __call__(self, signals: Dict[str, Signal]):
+        if self.signal_names is None:
+            self.signal_names = list(signals.keys())
+            self.writer.writerow(["time"] + self.signal_names)
+        self.writer.writerow([time.time()] + [signals[name].scaled_value for name in self.signal_names])
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,68 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from Signal import Signal
+
+
+@dataclass(frozen=True)
+class FrameSnapshot:
+    """
+    Immutable state of the engine after one frame, safe to read from any thread.
+    """
+    frame_id: int
+    timestamp: float  # time.time() when the snapshot was published
+    values: Dict[str, float]  # scaled value of every signal
+    fps: float
+
+
+class SnapshotMailbox:
+    """
+    Single slot mailbox handing the newest FrameSnapshot from the processing thread to a consumer, e.g. the GUI.
+    publish() replaces the slot, take() returns it once. Both only read or write one reference, which is atomic in
+    CPython, so neither side takes a lock and a reader never sees a half written frame.
+    notify is called from the publishing thread when the slot gets filled after the consumer took the last snapshot,
+    so a slow consumer is notified once per take() and not once per frame.
+    """
+
+    def __init__(self, notify: Optional[Callable[[], None]] = None):
+        """
+        Constructor for the mailbox
+        :param notify: called without arguments when new data is waiting, e.g. the emit of a queued Qt signal
+        """
+        self.notify = notify
+        self.frame_id = 0
+        self._snapshot: Optional[FrameSnapshot] = None
+        self._taken_frame_id = 0
+        self._notified = False
+
+    def publish(self, signals: Dict[str, Signal], fps: float = 0.):
+        """
+        Stores a snapshot of the signals, replaces a snapshot that was not taken yet.
+        """
+        self.frame_id += 1
+        self._snapshot = FrameSnapshot(self.frame_id, time.time(),
+                                       {name: signal.scaled_value for name, signal in signals.items()}, fps)
+        if not self._notified:
+            self._notified = True
+            if self.notify is not None:
+                self.notify()
+
+    def take(self) -> Optional[FrameSnapshot]:
+        """
+        Returns the newest snapshot or None if there was no new frame since the last take.
+        """
+        # re-arm the notification before taking, a frame published in between notifies again instead of getting lost
+        self._notified = False
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.frame_id == self._taken_frame_id:
+            return None
+        self._taken_frame_id = snapshot.frame_id
+        return snapshot
+
+    @property
+    def latest(self) -> Optional[FrameSnapshot]:
+        """
+        The newest snapshot, whether it was taken or not
+        """
+        return self._snapshot
@@ -4,63 +4,82 @@ import json
 import os.path
 import time
 import uuid
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from pynput import mouse
 from pynput import keyboard
 import pygame
+import numpy as np
 import pyqtgraph as pg
 from PySide6 import QtWidgets, QtCore, QtGui
 
+import DebugPreview
 import Demo
+from PlotBuffer import PlotBuffer
+from SnapshotMailbox import FrameSnapshot
 import Signal
+from LatencyProfiler import PROFILER
 from gui_widgets import LogarithmicSlider
 import re
 
 
 class PlotLine:
-    def __init__(self, pen, plot_data_item: pg.PlotDataItem):
-        self.x = [0.] * 100
-        self.y = [0.] * 100
-        self.length = 0
-        self.max_length = 100
+    """
+    Line of one signal in a SignalVis, plots its column of the PlotBuffer of the SignalVis.
+    """
+
+    def __init__(self, pen, plot_data_item: pg.PlotDataItem, column: int):
         self.pen = pen
         self.plot_data_item = plot_data_item
+        self.column = column
 
-    def plot(self, x, y):
-        if self.length < self.max_length:
-            self.x[self.length] = x
-            self.y[self.length] = y
-            self.length += 1
-        else:
-            self.x = self.x[1:]
-            self.x.append(x)
-            self.y = self.y[1:]
-            self.y.append(y)
-        self.plot_data_item.setData(self.x, self.y, pen=self.pen)
+    def plot(self, x: np.ndarray, y: np.ndarray):
+        self.plot_data_item.setData(x, y)
+
+    def is_visible(self) -> bool:
+        return self.plot_data_item.isVisible()
 
     def set_visible(self, visibility):
         self.plot_data_item.setVisible(visibility)
 
 
 class SignalVis(pg.PlotWidget):
-    def __init__(self):
+    def __init__(self, history: int = 100):
+        """
+        Plots the last history values of signals
+        :param history: number of plotted values per signal
+        """
         super(SignalVis, self).__init__()
         self.setBackground('w')
-        self.lines = {}
+        self.lines: Dict[str, PlotLine] = {}
+        self.buffer = PlotBuffer(history)
+        self.values = np.zeros(0)
 
     def add_line(self, name: str):
         pen = pg.mkPen(color=(255, 0, 0))
-        data_line = self.plot(x=[90, -90] * 50, y=[0] * 100, pen=pen)
-        plot_handler = PlotLine(pen, data_line)
+        data_line = self.plot(pen=pen)
+        plot_handler = PlotLine(pen, data_line, self.buffer.add_column())
         self.lines[name] = plot_handler
+        self.values = np.zeros(self.buffer.columns)
         return plot_handler
 
-    def update_plot(self, signals):
-        x = time.time()
+    def set_history(self, history: int):
+        self.buffer.set_history(history)
+
+    def update_plot(self, values: Dict[str, float], x: float):
+        """
+        Appends a sample to every line
+        :param values: scaled value of every signal, signals that are missing, e.g. after a source change, are 0
+        :param x: time of the sample
+        """
         for name, plot in self.lines.items():
-            y = signals[name].scaled_value
-            plot.plot(x, y)
+            self.values[plot.column] = values.get(name, 0.)
+        self.buffer.push(x, self.values)
+        # hidden lines keep their history, they are only handed to pyqtgraph while visible
+        x = self.buffer.x
+        for plot in self.lines.values():
+            if plot.is_visible():
+                plot.plot(x, self.buffer.line(plot.column))
 
 
 class SignalSetting(QtWidgets.QWidget):
@@ -100,12 +119,12 @@ class SignalSetting(QtWidgets.QWidget):
 
 
 class SignalTab(QtWidgets.QWidget):
-    def __init__(self, demo, json_path):
+    def __init__(self, demo, json_path, history: int = 100):
         super().__init__()
         self.demo = demo
         self.signal_config_defaults = json.load(open(json_path, "r"))
         self.setWindowTitle("Signals Visualization")
-        self.signals_vis = SignalVis()
+        self.signals_vis = SignalVis(history)
         self.signals_vis.setMaximumHeight(250)
         self.signals_vis.setMinimumHeight(100)
         size_policy = self.signals_vis.sizePolicy()
@@ -130,6 +149,8 @@ class SignalTab(QtWidgets.QWidget):
             handler = self.signals_vis.add_line(signal_name)
 
             setting.visualization_checkbox.stateChanged.connect(handler.set_visible)
+            setting.visualization_checkbox.stateChanged.connect(
+                lambda state, name=signal_name: self.set_signal_plotted(name, bool(state)))
             setting.visualization_checkbox.setChecked(False)
 
             setting.filter_slider.doubleValueChanged.connect(
@@ -151,39 +172,113 @@ class SignalTab(QtWidgets.QWidget):
         self.scroll_area.setWidget(self.setting_widget)
         self.layout.addWidget(self.scroll_area)
 
-    def update_plots(self, signals):
-        self.signals_vis.update_plot(signals)
+    def set_signal_plotted(self, name: str, plotted: bool):
+        # only plotted signals need to be computed
+        if plotted:
+            self.demo.subscribe_signal(name)
+        else:
+            self.demo.unsubscribe_signal(name)
 
+    def update_plots(self, snapshot: FrameSnapshot):
+        self.signals_vis.update_plot(snapshot.values, snapshot.timestamp)
+
+
+class PreviewImage(QtWidgets.QWidget):
+    """
+    Paints the newest debug preview from a persistent buffer. The preview is rendered at the size of this widget by
+    the DebugPreview thread, so painting is a plain copy without scaling or conversion to a QPixmap.
+    """
 
-class DebugVisualizetion(QtWidgets.QWidget):
     def __init__(self):
         super().__init__()
-        self.webcam_label = QtWidgets.QLabel()
+        self.buffer: Optional[np.ndarray] = None
+        self.qt_image: Optional[QtGui.QImage] = None
+
+    def set_image(self, image: np.ndarray):
+        """
+        Copies a BGR image into the buffer and schedules a repaint
+        """
+        if self.buffer is None or self.buffer.shape != image.shape:
+            self.buffer = np.empty_like(image)
+            self.qt_image = QtGui.QImage(self.buffer.data, image.shape[1], image.shape[0], image.shape[1] * 3,
+                                         QtGui.QImage.Format.Format_BGR888)
+        np.copyto(self.buffer, image)
+        self.update()
+
+    def image_rect(self) -> QtCore.QRect:
+        """
+        Centered rectangle of the image, scaled to fit the widget while it does not match the widget size yet
+        """
+        size = self.qt_image.size().scaled(self.size(), QtCore.Qt.AspectRatioMode.KeepAspectRatio)
+        return QtCore.QRect(QtCore.QPoint((self.width() - size.width()) // 2, (self.height() - size.height()) // 2),
+                            size)
+
+    def paintEvent(self, event: QtGui.QPaintEvent) -> None:
+        if self.qt_image is None:
+            return
+        painter = QtGui.QPainter(self)
+        painter.drawImage(self.image_rect(), self.qt_image)
+        painter.end()
+
+
+class DebugVisualizetion(QtWidgets.QWidget):
+    def __init__(self, debug_preview):
+        super().__init__()
+        self.debug_preview = debug_preview
+        self.frame_id = 0
+        self.subscribed = False
+        self.webcam_label = PreviewImage()
         self.webcam_label.setMinimumSize(1, 1)
         self.webcam_label.setMaximumSize(1280, 720)
         self.webcam_label.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Expanding)
+        self.layer_buttons = QtWidgets.QWidget()
+        self.layer_buttons.setLayout(QtWidgets.QHBoxLayout())
+        for layer in DebugPreview.FACE_MESH_LAYERS:
+            layer_button = QtWidgets.QCheckBox(text=layer.capitalize())
+            layer_button.setChecked(layer in debug_preview.layers)
+            layer_button.clicked.connect(lambda enabled, name=layer: self.debug_preview.set_layer(name, enabled))
+            self.layer_buttons.layout().addWidget(layer_button)
         self.status_bar = QtWidgets.QStatusBar()
         self.status_bar.showMessage("FPS: ")
         self.layout = QtWidgets.QVBoxLayout(self)
         self.layout.addWidget(self.webcam_label)
+        self.layout.addWidget(self.layer_buttons)
         self.layout.addWidget(self.status_bar)
 
-    def update_image(self, image):
-        w = self.webcam_label.width()
-        h = self.webcam_label.height()
-        self.qt_image = QtGui.QImage(image, image.shape[1], image.shape[0], QtGui.QImage.Format.Format_BGR888)
-        self.qt_image = self.qt_image.scaled(w, h, QtCore.Qt.AspectRatioMode.KeepAspectRatio,
-                                             QtCore.Qt.TransformationMode.SmoothTransformation)
-        self.webcam_label.setPixmap(QtGui.QPixmap.fromImage(self.qt_image))
+    def set_subscribed(self, subscribed: bool):
+        # previews are only rendered while the window is visible and not minimised
+        if subscribed == self.subscribed:
+            return
+        self.subscribed = subscribed
+        if subscribed:
+            self.debug_preview.subscribe()
+        else:
+            self.debug_preview.unsubscribe()
+
+    def showEvent(self, event: QtGui.QShowEvent) -> None:
+        super().showEvent(event)
+        self.set_subscribed(not self.isMinimized())
+
+    def hideEvent(self, event: QtGui.QHideEvent) -> None:
+        super().hideEvent(event)
+        self.set_subscribed(False)
+
+    def changeEvent(self, event: QtCore.QEvent) -> None:
+        super().changeEvent(event)
+        if event.type() == QtCore.QEvent.Type.WindowStateChange:
+            self.set_subscribed(self.isVisible() and not self.isMinimized())
+
+    def update_preview(self):
+        image = self.debug_preview.image
+        if not self.subscribed or self.debug_preview.frame_id == self.frame_id or image is None:
+            return
+        self.frame_id = self.debug_preview.frame_id
+        self.webcam_label.set_image(image)
 
     def resizeEvent(self, event: QtGui.QResizeEvent) -> None:
         super().resizeEvent(event)
-        self.webcam_label.resizeEvent(event)
-        self.status_bar.resizeEvent(event)
-        w = self.webcam_label.width()
-        h = self.webcam_label.height()
-        self.qt_image = self.qt_image.scaled(w, h, QtCore.Qt.AspectRatioMode.KeepAspectRatio)
-        self.webcam_label.setPixmap(QtGui.QPixmap.fromImage(self.qt_image))
+        # render the next previews at the new size, until then the last one is scaled while painting
+        self.debug_preview.set_max_size((self.webcam_label.width(), self.webcam_label.height()))
 
 
 class GeneralTab(QtWidgets.QWidget):
@@ -196,21 +291,38 @@ class GeneralTab(QtWidgets.QWidget):
         self.landmark_filter_button = QtWidgets.QCheckBox(text="Filter Landmarks.")
         self.landmark_filter_button.setChecked(False)
         self.landmark_filter_button.clicked.connect(lambda selected: self.demo.set_filter_landmarks(selected))
-        self.debug_window = DebugVisualizetion()
+        self.facemesh_process_button = QtWidgets.QCheckBox(text="Run face tracking in its own process.")
+        self.facemesh_process_button.setChecked(self.demo.facemesh_process)
+        self.facemesh_process_button.clicked.connect(lambda selected: self.demo.set_facemesh_process(selected))
+        self.profiler_button = QtWidgets.QCheckBox(text="Profile pipeline stages.")
+        self.profiler_button.setChecked(PROFILER.enabled)
+        self.profiler_button.clicked.connect(self.set_profiling)
+        self.debug_window = DebugVisualizetion(self.demo.debug_preview)
         self.debug_window_button = QtWidgets.QPushButton("Open Debug Menu")
         self.debug_window_button.clicked.connect(self.toggle_debug_window)
+        self.demo.preview_ready.connect(self.debug_window.update_preview)
         self.layout = QtWidgets.QVBoxLayout(self)
         self.layout.addWidget(self.mediapipe_selector_button)
         self.layout.addWidget(self.landmark_filter_button)
+        self.layout.addWidget(self.facemesh_process_button)
+        self.layout.addWidget(self.profiler_button)
         self.layout.addWidget(self.debug_window_button)
         self.layout.addStretch()
 
     def toggle_debug_window(self):
         self.debug_window.show()
 
-    def update_debug_visualization(self):
-        self.debug_window.update_image(self.demo.annotated_landmarks)
-        self.debug_window.status_bar.showMessage(f"FPS: {self.demo.fps}, Mode: {self.demo.mouse.mode}")
+    def set_profiling(self, enabled: bool):
+        PROFILER.reset()
+        PROFILER.set_enabled(enabled)
+
+    def update_debug_visualization(self, snapshot: FrameSnapshot):
+        if not self.debug_window.isVisible():
+            return
+        message = f"FPS: {snapshot.fps}, Dropped frames: {self.demo.dropped_frames}, Mode: {self.demo.mouse.mode}"
+        if PROFILER.enabled:
+            message += f", p50/p95/p99 ms: {PROFILER.format_summary()}"
+        self.debug_window.status_bar.showMessage(message)
 
 
 class MouseTab(QtWidgets.QWidget):
@@ -640,20 +752,32 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.setCentralWidget(self.central_widget)
 
-        self.timer = QtCore.QTimer(self)
-        self.timer.setInterval(30)
-        self.timer.timeout.connect(self.update_plots)
-        self.timer.start()
+        # repaint when the engine published a new frame, at most once per display refresh
+        self.last_update = 0.
+        self.update_timer = QtCore.QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.timeout.connect(self.update_plots)
+        self.demo.frame_ready.connect(self.schedule_update)
 
         self.change_signals_tab(False)
 
         ## Signals
         self.demo.start()
 
+    def schedule_update(self):
+        if self.update_timer.isActive():
+            return  # the pending update shows the newest frame anyway
+        refresh_rate = self.screen().refreshRate() or 60.
+        delay = self.last_update + 1. / refresh_rate - time.perf_counter()
+        self.update_timer.start(max(int(delay * 1000), 0))
+
     def update_plots(self):
-        # TODO: move up again
-        self.selected_signals.update_plots(self.demo.signals)
-        self.general_tab.update_debug_visualization()
+        snapshot = self.demo.snapshot_mailbox.take()
+        if snapshot is None:
+            return
+        self.last_update = time.perf_counter()
+        self.selected_signals.update_plots(snapshot)
+        self.general_tab.update_debug_visualization(snapshot)
 
     def change_signals_tab(self, checked: bool):
         if checked:
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Runs the gesture mouse pipeline without Qt or any GUI.
+
+Examples:
+    python headless.py --source livelinkface --sink print
+    python headless.py --source webcam --sink csv:signals.csv --duration 60
+    python headless.py --source webcam --sink mouse
+    python headless.py --source webcam --record recordings/session1
+    python headless.py --source replay:recordings/session1 --fast --sink csv:signals.csv
+"""
+import argparse
+import threading
+
+from Engine import Engine
+from LatencyProfiler import PROFILER
+import Sinks
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gesture mouse without GUI.")
+    parser.add_argument("--source", default="webcam",
+                        help="Where landmarks / blendshapes come from: webcam, livelinkface or replay:<recording>.")
+    parser.add_argument("--sink", action="append", default=[],
+                        help="Output for the signals, one of print, csv:<path>, mouse. Can be given multiple times.")
+    parser.add_argument("--config", default=None, help="Signal config json, defaults to the config of the source.")
+    parser.add_argument("--port", type=int, default=11111, help="UDP port for LiveLinkFace.")
+    parser.add_argument("--device", default=None,
+                        help="Subject uuid of the LiveLinkFace device to use, defaults to the first device that sends.")
+    parser.add_argument("--fuse-devices", action="store_true",
+                        help="Use the mean of all LiveLinkFace devices that send instead of a single device.")
+    parser.add_argument("--filter-landmarks", action="store_true", help="Kalman filter the webcam landmarks.")
+    parser.add_argument("--facemesh-process", action="store_true",
+                        help="Run webcam capture and FaceMesh in a worker process.")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds.")
+    parser.add_argument("--record", default=None, help="Record the session into this directory.")
+    parser.add_argument("--fast", action="store_true", help="Replay as fast as possible instead of in real time.")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="JSON",
+                        help="Time the pipeline stages, print p50/p95/p99 at the end and optionally dump them to JSON.")
+    return parser.parse_args(argv)
+
+
+def create_engine(args):
+    mouse = None
+    if "mouse" in args.sink:
+        import Mouse  # needs a display
+        mouse = Mouse.Mouse()
+    engine = Engine(mouse=mouse)
+    if args.source.startswith("replay:"):
+        engine.set_replay(args.source[len("replay:"):], realtime=not args.fast)
+    elif args.source in ("webcam", "livelinkface"):
+        engine.set_use_mediapipe(args.source == "webcam")
+    else:
+        raise ValueError(f"Unknown source {args.source}")
+    engine.set_filter_landmarks(args.filter_landmarks)
+    engine.set_facemesh_process(args.facemesh_process)
+    engine.UDP_PORT = args.port
+    engine.set_live_link_device(args.device)
+    engine.set_fuse_live_link_devices(args.fuse_devices)
+    if args.config is not None:
+        engine.mediapipe_config = args.config
+        engine.iphone_config = args.config
+
+    for sink in args.sink:
+        if sink == "mouse":
+            engine.enable_gesture_mouse()
+        elif sink == "print":
+            engine.add_sink(Sinks.PrintSink())
+        elif sink.startswith("csv:"):
+            engine.add_sink(Sinks.CsvSink(sink[len("csv:"):]))
+        else:
+            raise ValueError(f"Unknown sink {sink}")
+    if args.record is not None:
+        engine.start_recording(args.record)
+    return engine
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    PROFILER.set_enabled(args.profile is not None)
+    engine = create_engine(args)
+    thread = threading.Thread(target=engine.run, name="Engine")
+    thread.start()
+    try:
+        thread.join(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+        thread.join()
+        engine.stop_recording()
+        for sink in engine.sinks:
+            if hasattr(sink, "close"):
+                sink.close()
+        if args.profile is not None:
+            for name, (p50, p95, p99) in PROFILER.summary().items():
+                print(f"{name}: p50 {p50:.3f} ms, p95 {p95:.3f} ms, p99 {p99:.3f} ms")
+            if args.profile:
+                PROFILER.dump_json(args.profile)
+
+
+if __name__ == '__main__':
+    main()
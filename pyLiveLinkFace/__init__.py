@@ -1 +1 @@
-from .pylivelinkface import PyLiveLinkFace, FaceBlendShape
\ No newline at end of file
+from .pylivelinkface import PyLiveLinkFace, FaceBlendShape, LiveLinkFaceDecoder
@@ -246,3 +246,83 @@ class PyLiveLinkFace:
         else:
             #print("Data does not contain a face, returning default empty face.")
             return False, PyLiveLinkFace()
+
+
+class LiveLinkFaceDecoder:
+    """LiveLinkFaceDecoder class
+
+    Decodes PyLiveLinkFace packets without creating a PyLiveLinkFace object 
+    per packet. The header (version, uuid and name) is only parsed again when 
+    it changes, the blend shapes are converted from big-endian into the 
+    reused `blend_shapes` array, so its values are only valid until the next 
+    call of decode. Packets can be given as bytes or as any other bytes-like 
+    object, e.g. a memoryview into a receive buffer.
+    """
+
+    _frame_struct = struct.Struct("!if2ib")
+
+    def __init__(self) -> None:
+        self.version = 0
+        self.uuid = ""
+        self.name = ""
+        self.frame_number = 0
+        self.sub_frame = 0.
+        self.fps = 0
+        self.denominator = 0
+        self.blend_shapes = np.zeros(61, dtype=np.float32)
+        self._header = b""
+
+    def decode(self, bytes_data: bytes) -> bool:
+        """ Decodes the given bytes (send from an PyLiveLinkFace App or from 
+        this library) into this decoder. 
+
+        Parameters
+        ----------
+        bytes_data : bytes-like
+            Bytes input to decode.
+
+        Returns
+        -------
+        bool
+            True if the bytes data contained a face, False if not. The 
+            blend shapes keep their previous values if there was no face.
+        """
+        name_end_pos = len(self._header)
+        if not name_end_pos or bytes_data[:name_end_pos] != self._header:
+            self._parse_header(bytes_data)
+            name_end_pos = len(self._header)
+        if len(bytes_data) <= name_end_pos + 16:
+            return False
+
+        #FFrameTime, FFrameRate and data length
+        self.frame_number, self.sub_frame, self.fps, self.denominator, data_length = \
+            self._frame_struct.unpack_from(bytes_data, name_end_pos)
+        if data_length != 61:
+            raise ValueError(
+                f'Blend shape length is {data_length} but should be 61, something is wrong with the data.')
+
+        self.blend_shapes[:] = np.frombuffer(bytes_data, dtype='>f4', count=61, offset=name_end_pos + 17)
+        return True
+
+    def _parse_header(self, bytes_data: bytes) -> None:
+        self.version = struct.unpack_from('<i', bytes_data, 0)[0]
+        self.uuid = bytes(bytes_data[4:41]).decode("utf-8")
+        name_length = struct.unpack_from('!i', bytes_data, 41)[0]
+        name_end_pos = 45 + name_length
+        self.name = bytes(bytes_data[45:name_end_pos]).decode("utf-8")
+        self._header = bytes(bytes_data[:name_end_pos])
+
+    def get_blendshape(self, index: FaceBlendShape) -> float:
+        """ Get the value of the blend shape in the last decoded packet. 
+
+        Parameters
+        ----------
+        index : FaceBlendShape
+            Index of the BlendShape to get the value from.
+
+        Returns
+        -------
+        float
+            The value of the BlendShape.
+        """
+        return float(self.blend_shapes[index.value])
@@ -0,0 +1,115 @@
+import tracemalloc
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from PnPHeadPose import PnPHeadPose
+from pyLiveLinkFace import PyLiveLinkFace, FaceBlendShape
+
+FRAME_SIZE = (1280, 720)
+CAMERA_PARAMETERS = (1000, 1000, 1280 / 2, 720 / 2)
+
+
+def synthetic_landmarks(frame: int = 0) -> np.ndarray:
+    """
+    Normalized (478, 3) landmarks of the canonical face model, slightly rotated depending on frame and projected
+    with CAMERA_PARAMETERS, the 10 iris landmarks are placed at the eye centers.
+    """
+    model = PnPHeadPose().canonical_metric_landmarks
+    fx, fy, cx, cy = CAMERA_PARAMETERS
+    camera_matrix = np.array([[fx, 0, cx], [0, fy, cy], [0, 0, 1]], dtype=np.float64)
+    rvec = np.array([0.1 * np.sin(frame / 20), 0.2 * np.cos(frame / 30), 0.05])
+    tvec = np.array([1., 2., 60.])
+    points, _ = cv2.projectPoints(model, rvec, tvec, camera_matrix, None)
+    depth = (cv2.Rodrigues(rvec)[0] @ model.T)[2]
+
+    landmarks = np.zeros((478, 3))
+    landmarks[:468, 0] = points[:, 0, 0] / FRAME_SIZE[0]
+    landmarks[:468, 1] = points[:, 0, 1] / FRAME_SIZE[1]
+    landmarks[:468, 2] = depth * fx / tvec[2] / FRAME_SIZE[0]
+    landmarks[468:473] = landmarks[[33, 133]].mean(axis=0)
+    landmarks[473:478] = landmarks[[362, 263]].mean(axis=0)
+    return landmarks
+
+
+@pytest.fixture(scope="session")
+def frame_size():
+    return FRAME_SIZE
+
+
+@pytest.fixture(scope="session")
+def camera_parameters():
+    return CAMERA_PARAMETERS
+
+
+@pytest.fixture(scope="session")
+def landmarks() -> np.ndarray:
+    return synthetic_landmarks()
+
+
+@pytest.fixture(scope="session")
+def landmark_sequence() -> np.ndarray:
+    return np.stack([synthetic_landmarks(frame) for frame in range(100)])
+
+
+@pytest.fixture(scope="session")
+def landmark_list(landmarks):
+    from mediapipe.framework.formats import landmark_pb2
+
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in landmarks:
+        landmark = landmark_list.landmark.add()
+        landmark.x, landmark.y, landmark.z = x, y, z
+    return landmark_list
+
+
+@pytest.fixture(scope="session")
+def image() -> np.ndarray:
+    return np.random.default_rng(0).integers(0, 255, (FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+
+
+@pytest.fixture(scope="session")
+def packet() -> bytes:
+    live_link_face = PyLiveLinkFace()
+    for blend_shape in FaceBlendShape:
+        live_link_face.set_blendshape(blend_shape, blend_shape.value / 61)
+    return live_link_face.encode()
+
+
+def allocation_stats(function, *args):
+    """
+    Runs function once under tracemalloc.
+    Returns the peak of newly allocated memory and the number of memory blocks still allocated afterwards.
+    """
+    function(*args)  # warm up caches
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        blocks_before = len(tracemalloc.take_snapshot().traces)
+        tracemalloc.reset_peak()
+        function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        blocks_after = len(tracemalloc.take_snapshot().traces)
+    finally:
+        tracemalloc.stop()
+    return {"alloc_peak_bytes": peak - before, "alloc_retained_blocks": blocks_after - blocks_before}
+
+
+@pytest.fixture
+def pipeline_benchmark(benchmark):
+    """
+    benchmark fixture that additionally reports frames per second and allocation statistics in extra_info.
+    usage pipeline_benchmark(function, *args)
+    """
+
+    def run(function, *args):
+        result = benchmark(function, *args)
+        if benchmark.stats is not None:
+            benchmark.extra_info["frames_per_second"] = 1. / benchmark.stats.stats.mean
+        benchmark.extra_info.update(allocation_stats(function, *args))
+        return result
+
+    return run
@@ -0,0 +1,86 @@
+import itertools
+import uuid
+
+import numpy as np
+import pytest
+
+import DrawingDebug
+from Engine import Engine
+import face_geometry
+from KalmanFilter1D import Kalman1D, KalmanBank
+from PnPHeadPose import PnPHeadPose
+from Signal import Action, Signal
+from SignalsCalculator import SignalsCalculater
+from pyLiveLinkFace import LiveLinkFaceDecoder, PyLiveLinkFace
+
+
+@pytest.mark.parametrize("pose_tracking", [False, True])
+def test_signals_calculator_process(pipeline_benchmark, landmark_sequence, camera_parameters, frame_size,
+                                    pose_tracking):
+    calculator = SignalsCalculater(camera_parameters, frame_size, pose_tracking=pose_tracking)
+    frames = itertools.cycle(landmark_sequence)
+    signals = pipeline_benchmark(lambda: calculator.process(next(frames)))
+    assert "HeadPitch" in signals
+
+
+@pytest.mark.parametrize("tracking", [False, True])
+def test_pnp_fit_func(pipeline_benchmark, landmark_sequence, camera_parameters, frame_size, tracking):
+    head_pose = PnPHeadPose(tracking=tracking)
+    screen_landmarks = itertools.cycle(landmark_sequence[:, :, :2] * frame_size)
+    rvec, tvec = pipeline_benchmark(lambda: head_pose.fit_func(next(screen_landmarks), camera_parameters))
+    assert rvec.shape == (3, 1)
+
+
+def test_get_metric_landmarks(pipeline_benchmark, landmarks, frame_size):
+    pcf = face_geometry.PCF(1, 10000, frame_size[1], frame_size[0])
+    screen_landmarks = np.ascontiguousarray(landmarks[:468].T)
+    metric_landmarks, pose = pipeline_benchmark(
+        lambda: face_geometry.get_metric_landmarks(screen_landmarks.copy(), pcf))
+    assert pose.shape == (4, 4)
+
+
+def test_kalman1d_update(pipeline_benchmark):
+    kalman = Kalman1D(R=0.008 ** 2)
+    pipeline_benchmark(kalman.update, 0.5 + 0.5j)
+
+
+def test_kalman_bank_update(pipeline_benchmark, landmarks):
+    bank = KalmanBank((468, 2), R=0.008 ** 2)
+    pipeline_benchmark(bank.update, landmarks[:468, :2])
+
+
+def test_live_link_face_decode(pipeline_benchmark, packet):
+    success, live_link_face = pipeline_benchmark(PyLiveLinkFace.decode, packet)
+    assert success
+
+
+def test_live_link_face_decoder(pipeline_benchmark, packet):
+    decoder = LiveLinkFaceDecoder()
+    assert pipeline_benchmark(decoder.decode, packet)
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_live_link_face_burst(pipeline_benchmark, packet, batched):
+    engine = Engine()
+    engine.setup_signals(engine.iphone_config)
+    engine.add_sink(lambda signals: None)
+    burst = [memoryview(packet)] * 32
+    if batched:
+        pipeline_benchmark(engine.process_packets, burst)
+    else:
+        pipeline_benchmark(lambda: [engine.process_packet(data) for data in burst])
+
+
+@pytest.mark.parametrize("num_actions", [0, 1, 10])
+def test_signal_set_value(pipeline_benchmark, num_actions):
+    signal = Signal("JawOpen")
+    signal.set_filter_value(0.01)
+    for _ in range(num_actions):
+        signal.add_action(uuid.uuid4(), Action())
+    values = itertools.cycle(np.linspace(0., 1., 100))
+    pipeline_benchmark(lambda: signal.set_value(next(values)))
+
+
+def test_annotate_landmark_image(pipeline_benchmark, landmark_list, image):
+    annotated = pipeline_benchmark(DrawingDebug.annotate_landmark_image, landmark_list, image)
+    assert annotated.shape == image.shape
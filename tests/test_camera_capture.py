@@ -0,0 +1,47 @@
+import numpy as np
+
+from CameraCapture import CameraCapture
+
+
+class FakeVideoCapture:
+    """
+    Stands in for cv2.VideoCapture, decodes a few BGR frames whose blue channel is the frame number.
+    """
+
+    def __init__(self, frames=3, shape=(4, 6, 3)):
+        self.frames = frames
+        self.shape = shape
+        self.grabbed = 0
+
+    def isOpened(self):
+        return self.grabbed < self.frames
+
+    def grab(self):
+        self.grabbed += 1
+        return True
+
+    def retrieve(self, image=None):
+        if image is None or image.shape != self.shape:
+            image = np.empty(self.shape, dtype=np.uint8)
+        image[...] = (self.grabbed, 0, 255)
+        return True, image
+
+
+def run_capture(color_order):
+    capture = CameraCapture(color_order=color_order)
+    capture.cam_cap = FakeVideoCapture()
+    capture.is_running = True
+    capture._run()  # the capture thread, run synchronously until the fake camera closes
+    return capture.read(timeout=0.)
+
+
+def test_capture_decodes_bgr_into_the_ring():
+    success, image = run_capture("BGR")
+    assert success
+    np.testing.assert_array_equal(image[0, 0], (3, 0, 255))
+
+
+def test_capture_converts_to_rgb_into_the_ring():
+    success, image = run_capture("RGB")
+    assert success
+    np.testing.assert_array_equal(image[2, 3], (255, 0, 3))
@@ -0,0 +1,36 @@
+import socket
+
+import pytest
+
+from DatagramReader import DatagramReader
+
+
+@pytest.fixture
+def sockets():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setblocking(False)
+    receiver.bind(("127.0.0.1", 0))
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    yield sender, receiver
+    sender.close()
+    receiver.close()
+
+
+@pytest.mark.parametrize("use_recvmmsg", [True, False])
+def test_reads_bursts_in_batches(sockets, use_recvmmsg):
+    sender, receiver = sockets
+    reader = DatagramReader(receiver, batch_size=8, max_size=64, use_recvmmsg=use_recvmmsg)
+    assert reader.read() == 0
+
+    datagrams = [bytes([i]) * (10 + i) for i in range(12)]
+    for datagram in datagrams:
+        sender.sendto(datagram, receiver.getsockname())
+
+    received = []
+    count = reader.read()
+    assert count == 8
+    received += [bytes(packet) for packet in reader.packets(count)]
+    count = reader.read()
+    received += [bytes(packet) for packet in reader.packets(count)]
+    assert received == datagrams
+    assert reader.read() == 0
@@ -0,0 +1,37 @@
+import numpy as np
+from scipy.spatial.transform import Rotation
+
+import face_geometry
+
+
+def test_solver_matches_generic_solution():
+    rng = np.random.default_rng(0)
+    sources = face_geometry.canonical_metric_landmarks
+    rotation = Rotation.from_rotvec([0.1, -0.3, 0.05]).as_matrix()
+    targets = 1.7 * rotation @ sources + np.array([[3.], [-2.], [40.]]) + rng.normal(0, 0.1, sources.shape)
+
+    expected = face_geometry.solve_weighted_orthogonal_problem(sources, targets, face_geometry.landmark_weights)
+    solved = face_geometry.PROCRUSTES_SOLVER.solve(targets)
+    np.testing.assert_allclose(solved, expected, atol=1e-10)
+    np.testing.assert_allclose(solved[:3, :3] / 1.7, rotation, atol=1e-2)
+
+    selected = targets[:, face_geometry.PROCRUSTES_SOLVER.indices]
+    np.testing.assert_allclose(face_geometry.PROCRUSTES_SOLVER.solve_selected(selected), expected, atol=1e-10)
+
+
+def test_determinant_3x3():
+    matrix = np.random.default_rng(1).random((3, 3))
+    assert np.isclose(face_geometry.determinant_3x3(matrix), np.linalg.det(matrix))
+
+
+def test_canonical_model_is_shared_and_read_only():
+    import CanonicalFaceModel
+    from PnPHeadPose import PnPHeadPose
+
+    positions = CanonicalFaceModel.positions()
+    assert positions.shape == (468, 3)
+    assert not positions.flags.writeable
+    assert positions is CanonicalFaceModel.positions()
+    np.testing.assert_array_equal(face_geometry.canonical_metric_landmarks, positions.T)
+    assert len(face_geometry.procrustes_landmark_basis) == 33
+    assert PnPHeadPose().points_idx == [index for index, _ in face_geometry.procrustes_landmark_basis]
@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+import pytest
+
+from FaceMeshOverlay import LAYERS, FaceMeshOverlay
+
+
+@pytest.fixture(scope="module")
+def face():
+    # canonical face model projected into a 320x240 image
+    import CanonicalFaceModel
+
+    model = CanonicalFaceModel.positions()
+    landmarks = np.full((478, 3), 0.5)
+    landmarks[:468, 0] = 0.5 + model[:, 0] / 40.
+    landmarks[:468, 1] = 0.5 - model[:, 1] / 40.
+    landmarks[468:, :2] = landmarks[[33, 33, 33, 33, 33, 263, 263, 263, 263, 263], :2]
+    return landmarks
+
+
+def test_tesselation_matches_mediapipe_drawing_utils(face):
+    from mediapipe.python.solutions import drawing_utils, face_mesh_connections
+    from mediapipe.framework.formats import landmark_pb2
+
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in face.tolist():
+        landmark_list.landmark.add(x=x, y=y, z=z)
+    expected = np.zeros((240, 320, 3), dtype=np.uint8)
+    drawing_utils.draw_landmarks(expected, landmark_list, face_mesh_connections.FACEMESH_TESSELATION,
+                                 landmark_drawing_spec=None,
+                                 connection_drawing_spec=drawing_utils.DrawingSpec((128, 128, 128), thickness=1))
+
+    image = FaceMeshOverlay(["tesselation"]).draw(np.zeros((240, 320, 3), dtype=np.uint8), face)
+    np.testing.assert_array_equal(image, expected)
+
+
+def test_layers_can_be_switched_off(face):
+    overlay = FaceMeshOverlay([])
+    pose = (np.zeros(3), np.array([0., 0., 60.]), np.array([[300., 0, 160], [0, 300., 120], [0, 0, 1]]))
+    assert not overlay.draw(np.zeros((240, 320, 3), dtype=np.uint8), face, pose).any()
+
+    drawn = {}
+    for layer in LAYERS:
+        overlay.set_layer(layer, True)
+        drawn[layer] = overlay.draw(np.zeros((240, 320, 3), dtype=np.uint8), face, pose).any(2)
+        overlay.set_layer(layer, False)
+    assert all(pixels.any() for pixels in drawn.values())
+    assert not (drawn["irises"] == drawn["contours"]).all()
+    with pytest.raises(ValueError):
+        overlay.set_layer("hair", True)
+
+
+def test_edges_of_landmarks_outside_of_the_image_are_skipped(face):
+    outside = face.copy()
+    outside[:, 0] -= 0.6
+    image = FaceMeshOverlay(["tesselation", "landmarks"]).draw(np.zeros((240, 320, 3), dtype=np.uint8), outside)
+    assert not image[:, 40:].any()
+    assert cv2.countNonZero(image[..., 0]) > 0
+
+
+def test_debug_preview_scales_the_pose_with_the_image(face):
+    import DebugPreview
+
+    preview = DebugPreview.DebugPreview(max_size=(320, 240))
+    for layer in LAYERS:
+        preview.set_layer(layer, layer == "pose")
+    camera_matrix = np.array([[1280., 0, 640], [0, 1280., 480], [0, 0, 1]])
+    pose = (np.zeros(3), np.array([0., 0., 60.]), camera_matrix)
+    image = preview._render(face, np.zeros((960, 1280, 3), dtype=np.uint8), pose)
+
+    expected = np.zeros((240, 320, 3), dtype=np.uint8)
+    FaceMeshOverlay(["pose"]).draw(expected, face, (pose[0], pose[1], camera_matrix * ((0.25,), (0.25,), (1,))))
+    np.testing.assert_array_equal(image, cv2.flip(expected, 1))
+    np.testing.assert_array_equal(camera_matrix[0], (1280., 0, 640))
@@ -0,0 +1,70 @@
+import numpy as np
+
+from FaceMeshWorker import FaceMeshWorker, SharedFrameRing
+
+
+class FakeCamera:
+    """
+    Stands in for CameraCapture in the worker process, delivers a blue 320x240 frame without a face.
+    """
+
+    def __init__(self, device, frame_width, frame_height):
+        self.image = np.zeros((240, 320, 3), dtype=np.uint8)
+        self.image[..., 0] = 255
+        self.is_running = False
+
+    def start(self):
+        self.is_running = True
+
+    def stop(self):
+        self.is_running = False
+
+    def is_opened(self):
+        return self.is_running
+
+    def read(self, timeout=1.0):
+        return True, self.image
+
+
+def test_shared_frame_ring_attaches_by_name():
+    ring = SharedFrameRing(2, (4, 6, 3), num_landmarks=5)
+    try:
+        other = SharedFrameRing(*ring.spec())
+        other.frames[1, 2, 3] = (1, 2, 3)
+        other.landmarks[0, 4] = (0.1, 0.2, 0.3)
+        np.testing.assert_array_equal(ring.frames[1, 2, 3], (1, 2, 3))
+        np.testing.assert_array_equal(ring.landmarks[0, 4], (0.1, 0.2, 0.3))
+        other.close()
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+def test_worker_hands_frames_over_the_ring():
+    with FaceMeshWorker(frame_width=160, frame_height=120, slots=3, camera_factory=FakeCamera) as worker:
+        frames = []
+        for _ in range(200):
+            frame = worker.receive(timeout=1.0)
+            if frame is None:
+                continue
+            # BGR blue resized into the slot and converted to RGB
+            frames.append((frame.frame_id, frame.has_face, frame.image.shape, frame.image[60, 80].tolist()))
+            worker.release(frame)
+            if len(frames) == 5:
+                break
+    assert len(frames) == 5
+    assert all(frame[1:] == (False, (120, 160, 3), [0, 0, 255]) for frame in frames)
+    assert [frame[0] for frame in frames] == sorted({frame[0] for frame in frames})
+    assert worker.ring is None and not worker.is_alive()
+
+
+def test_engine_reports_drops_of_the_active_source():
+    from Engine import Engine
+
+    engine = Engine()
+    engine.camera.dropped_frames = 2
+    engine.facemesh_worker = FaceMeshWorker()
+    engine.facemesh_worker.dropped_frames = 5
+    assert engine.dropped_frames == 2
+    engine.set_facemesh_process(True)
+    assert engine.dropped_frames == 5
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import GeometricFeatures
+
+
+def det(p1, p2, p3):
+    return np.linalg.det(np.vstack((np.column_stack((p1, p2, p3)), np.ones(3))))
+
+
+def reference_five_point_cross_ratio(landmarks, indices):
+    p1, p2, p3, p4, p5 = landmarks[indices, :2]
+    return (det(p1, p2, p4) * det(p1, p3, p5)) / (det(p1, p2, p5) * det(p1, p3, p4))
+
+
+@pytest.fixture
+def landmarks():
+    return np.random.default_rng(0).random((478, 3)) * (1280, 720, 1280)
+
+
+def test_five_point_cross_ratios(landmarks):
+    indices = [[9, 69, 299, 65, 295], [1, 2, 3, 4, 5]]
+    expected = [reference_five_point_cross_ratio(landmarks, row) for row in indices]
+    np.testing.assert_allclose(GeometricFeatures.five_point_cross_ratios(landmarks, indices), expected)
+
+
+def test_cross_cross_ratios(landmarks):
+    indices = [216, 207, 214, 212, 206, 92]
+    expected = reference_five_point_cross_ratio(landmarks, [216, 214, 212, 206, 92]) / \
+        reference_five_point_cross_ratio(landmarks, [207, 214, 212, 206, 92])
+    np.testing.assert_allclose(GeometricFeatures.cross_cross_ratios(landmarks, [indices]), [expected])
+
+
+def test_distance_cross_and_eye_aspect_ratios(landmarks):
+    p = landmarks
+    np.testing.assert_allclose(GeometricFeatures.distance_ratios(landmarks, [[1, 18, 10, 151]]),
+                               [np.linalg.norm(p[1] - p[18]) / np.linalg.norm(p[10] - p[151])])
+    p1, p2, p3, p4 = p[[225, 46, 70, 71], :2]
+    np.testing.assert_allclose(GeometricFeatures.cross_ratios(landmarks, [[225, 46, 70, 71]]),
+                               [(np.linalg.norm(p3 - p1) * np.linalg.norm(p4 - p2)) /
+                                (np.linalg.norm(p4 - p1) * np.linalg.norm(p3 - p2))])
+    p1, p2, p3, p4, p5, p6 = p[[33, 160, 158, 133, 153, 144]]
+    np.testing.assert_allclose(GeometricFeatures.eye_aspect_ratios(landmarks, [[33, 160, 158, 133, 153, 144]]),
+                               [(np.linalg.norm(p2 - p6) + np.linalg.norm(p3 - p5)) / (2 * np.linalg.norm(p1 - p4))])
+
+
+def test_feature_table_batches():
+    table = GeometricFeatures.FeatureTable()
+    table.add("JawOpen", "distance_ratio", [1, 18, 10, 151])
+    table.add("BrowInnerUp", "five_point_cross_ratio", [9, 69, 299, 65, 295])
+    table.add("BrowOuterUpLeft", "cross_ratio", [225, 46, 70, 71])
+    table.add("MouthSmileLeft", "cross_cross_ratio", [216, 207, 214, 212, 206, 92])
+    with pytest.raises(ValueError):
+        table.add("Broken", "cross_ratio", [1, 2, 3])
+
+    frames = np.random.default_rng(1).random((5, 478, 3))
+    scale = (1280, 720, 1280)
+    batch = table(frames, scale)
+    assert batch.shape == (5, 4)
+    for frame, features in zip(frames, batch):
+        np.testing.assert_allclose(table(frame, scale), features)
+        pixels = frame * scale
+        np.testing.assert_allclose(features[table.index("BrowInnerUp")],
+                                   reference_five_point_cross_ratio(pixels, [9, 69, 299, 65, 295]))
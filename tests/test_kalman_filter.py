@@ -0,0 +1,16 @@
+import numpy as np
+
+from KalmanFilter1D import Kalman1D, KalmanBank
+
+
+def test_kalman_bank_matches_kalman1d():
+    rng = np.random.default_rng(0)
+    measurements = rng.normal(0.5, 0.01, size=(250, 468, 2))
+    filters = [Kalman1D(R=0.008 ** 2) for _ in range(468)]
+    bank = KalmanBank((468, 2), R=0.008 ** 2)
+
+    for frame in measurements:
+        expected = np.array([filters[i].update(frame[i, 0] + 1j * frame[i, 1]) for i in range(468)])
+        filtered = bank.update(frame)
+        np.testing.assert_allclose(filtered[:, 0], expected.real, rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(filtered[:, 1], expected.imag, rtol=1e-12, atol=1e-12)
@@ -0,0 +1,39 @@
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from LandmarkExtractor import LandmarkExtractor, landmarks_to_numpy
+
+
+def make_landmark_list(points, visibility=False):
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in points:
+        landmark = landmark_list.landmark.add()
+        landmark.x, landmark.y, landmark.z = x, y, z
+        if visibility:
+            landmark.visibility = 1.
+            landmark.presence = 1.
+    return landmark_list
+
+
+def test_landmarks_to_numpy_matches_protobuf():
+    points = np.random.default_rng(0).random((478, 3)).astype(np.float32)
+    for visibility in (False, True):
+        landmark_list = make_landmark_list(points, visibility)
+        expected = np.array([(lm.x, lm.y, lm.z) for lm in landmark_list.landmark])
+        np.testing.assert_array_equal(landmarks_to_numpy(landmark_list), expected)
+
+
+def test_landmarks_to_numpy_partial_fields():
+    landmark_list = make_landmark_list(np.zeros((3, 3)))
+    landmark_list.landmark[1].ClearField("z")
+    landmark_list.landmark[2].x = 0.5
+    np.testing.assert_array_equal(landmarks_to_numpy(landmark_list), [[0, 0, 0], [0, 0, 0], [0.5, 0, 0]])
+
+
+def test_landmark_extractor_reuses_buffer():
+    extractor = LandmarkExtractor()
+    landmark_list = make_landmark_list(np.ones((478, 3)))
+    first = extractor(landmark_list)
+    second = extractor(landmark_list)
+    assert first is second
+    assert first.shape == (478, 3)
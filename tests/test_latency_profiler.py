@@ -0,0 +1,20 @@
+from LatencyProfiler import LatencyProfiler
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = LatencyProfiler()
+    with profiler.span("stage"):
+        pass
+    assert profiler.summary() == {}
+
+
+def test_percentiles_within_bin_resolution():
+    profiler = LatencyProfiler(enabled=True)
+    for duration_ms in range(1, 101):
+        profiler.record("stage", duration_ms * 1_000_000)
+    p50, p95, p99 = profiler.summary()["stage"]
+    # 8 bins per octave -> upper bin edges are at most 2 ** (1 / 8) ~ 9 % above the true value
+    assert 50 <= p50 <= 50 * 1.1
+    assert 95 <= p95 <= 95 * 1.1
+    assert 99 <= p99 <= 100
+    assert profiler.dump()["stage"]["count"] == 100
@@ -0,0 +1,124 @@
+import numpy as np
+
+from LiveLinkFaceReceiver import LiveLinkFaceReceiver
+from pyLiveLinkFace import FaceBlendShape, LiveLinkFaceDecoder, PyLiveLinkFace
+
+
+def encode_face(name: str, offset: float) -> bytes:
+    live_link_face = PyLiveLinkFace(name=name, fps=60)
+    for blend_shape in FaceBlendShape:
+        live_link_face.set_blendshape(blend_shape, offset + blend_shape.value / 61)
+    return live_link_face.encode()
+
+
+def test_decoder_matches_decode():
+    decoder = LiveLinkFaceDecoder()
+    for packet in (encode_face("iPhone", 0.), encode_face("iPhone", 0.5), encode_face("iPad", 0.25)):
+        success, live_link_face = PyLiveLinkFace.decode(packet)
+        assert success
+        assert decoder.decode(packet)
+        assert decoder.uuid == live_link_face.uuid
+        assert decoder.name == live_link_face.name
+        assert decoder.fps == live_link_face.fps
+        assert decoder.frame_number == live_link_face._frames
+        for blend_shape in FaceBlendShape:
+            assert decoder.get_blendshape(blend_shape) == live_link_face.get_blendshape(blend_shape)
+
+
+def test_decoder_reuses_buffer_and_keeps_values_without_face():
+    decoder = LiveLinkFaceDecoder()
+    packet = encode_face("iPhone", 0.)
+    blend_shapes = decoder.blend_shapes
+    assert decoder.decode(packet)
+    assert decoder.blend_shapes is blend_shapes
+    values = blend_shapes.copy()
+
+    header_length = 45 + len("iPhone")
+    assert not decoder.decode(packet[:header_length])
+    assert decoder.name == "iPhone"
+    np.testing.assert_array_equal(decoder.blend_shapes, values)
+
+
+def encode_device(uuid: str, value: float) -> bytes:
+    live_link_face = PyLiveLinkFace(name="iPhone", uuid=uuid)
+    for blend_shape in FaceBlendShape:
+        live_link_face.set_blendshape(blend_shape, value)
+    return live_link_face.encode()
+
+
+UUID_A = "$" + "a" * 36
+UUID_B = "$" + "b" * 36
+
+
+def test_receiver_keeps_devices_apart():
+    receiver = LiveLinkFaceReceiver()
+    device_a = receiver.receive(encode_device(UUID_A, 0.25), now=0.)
+    device_b = receiver.receive(encode_device(UUID_B, 0.75), now=0.01)
+    assert device_a is not device_b
+    assert (device_a.uuid, device_b.uuid) == (UUID_A, UUID_B)
+    assert receiver.receive(encode_device(UUID_A, 0.5), now=0.02) is device_a
+    assert device_a.frames == 2
+    np.testing.assert_allclose(device_a.blend_shapes, 0.5)
+    np.testing.assert_allclose(device_b.blend_shapes, 0.75)
+
+
+def test_receiver_output_selection():
+    receiver = LiveLinkFaceReceiver(device_timeout=1.)
+    device_a = receiver.receive(encode_device(UUID_A, 0.25), now=0.)
+    assert receiver.is_output(device_a)
+    device_b = receiver.receive(encode_device(UUID_B, 0.75), now=0.5)
+    assert not receiver.is_output(device_b)
+    np.testing.assert_allclose(receiver.fuse_blend_shapes(0.5), 0.5)
+
+    # the first device went silent, the next one takes over
+    device_b = receiver.receive(encode_device(UUID_B, 0.75), now=1.5)
+    assert receiver.is_output(device_b)
+    np.testing.assert_allclose(receiver.fuse_blend_shapes(1.5), 0.75)
+
+    receiver.set_pinned_device(UUID_A[1:])
+    assert not receiver.is_output(device_b)
+    assert receiver.is_output(receiver.receive(encode_device(UUID_A, 0.25), now=1.6))
+
+
+def test_receiver_forgets_silent_devices():
+    receiver = LiveLinkFaceReceiver(device_timeout=1., forget_timeout=10.)
+    device_a = receiver.receive(encode_device(UUID_A, 0.25), now=0.)
+    assert receiver.is_output(device_a)
+    receiver.receive(encode_device(UUID_B, 0.75), now=5.)
+    assert len(receiver.devices) == 2
+
+    # a new device drops the ones that were silent for forget_timeout
+    receiver.receive(encode_device("$" + "c" * 36, 0.5), now=11.)
+    assert [device.uuid for device in receiver.devices.values()] == [UUID_B, "$" + "c" * 36]
+    assert receiver.output_device is None
+    assert receiver.receive(encode_device(UUID_A, 0.25), now=12.) is not device_a
+
+
+def test_receiver_skips_invalid_packets():
+    receiver = LiveLinkFaceReceiver()
+    packet = encode_device(UUID_A, 0.25)
+    for data in (b"", b"hello world", packet[:-8]):
+        assert receiver.receive(data, now=0.) is None
+    assert receiver.invalid_packets == 3
+    # a packet that ends after the header has no face, but is valid
+    assert receiver.receive(packet[:60], now=0.) is None
+    assert receiver.invalid_packets == 3
+    device = receiver.receive(packet, now=0.1)
+    assert device.uuid == UUID_A
+    np.testing.assert_allclose(device.blend_shapes, 0.25)
+
+def test_engine_outputs_newest_frame_of_a_burst():
+    from Engine import Engine
+
+    engine = Engine()
+    engine.setup_signals(engine.iphone_config)
+    outputs = []
+    engine.add_sink(lambda signals: outputs.append(signals["JawOpen"].raw_value.get()))
+    engine.process_packets([memoryview(encode_device(UUID_A, value)) for value in (0.2, 0.4, 0.6)])
+    assert len(outputs) == 1
+
+    reference = Engine()
+    reference.setup_signals(reference.iphone_config)
+    for value in (0.2, 0.4, 0.6):
+        reference.process_packet(encode_device(UUID_A, value))
+    assert outputs[0] == reference.signals["JawOpen"].raw_value.get()
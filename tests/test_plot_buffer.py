@@ -0,0 +1,31 @@
+import numpy as np
+
+from PlotBuffer import PlotBuffer
+
+
+def test_plot_buffer_keeps_the_newest_samples_in_order():
+    buffer = PlotBuffer(history=4, columns=2)
+    assert len(buffer.x) == 0
+    for i in range(10):
+        buffer.push(i, (i, -i))
+        newest = np.arange(max(i - 3, 0), i + 1)
+        np.testing.assert_array_equal(buffer.x, newest)
+        np.testing.assert_array_equal(buffer.line(0), newest)
+        np.testing.assert_array_equal(buffer.line(1), -newest)
+    # views into the buffer, no copies
+    assert np.shares_memory(buffer.x, buffer._x)
+    assert buffer.line(1).flags.c_contiguous
+
+
+def test_plot_buffer_add_column_and_set_history():
+    buffer = PlotBuffer(history=5)
+    column = buffer.add_column()
+    for i in range(7):
+        buffer.push(i, (i,))
+    buffer.set_history(3)
+    np.testing.assert_array_equal(buffer.x, [4, 5, 6])
+    buffer.set_history(6)
+    buffer.push(7, (7,))
+    np.testing.assert_array_equal(buffer.line(column), [4, 5, 6, 7])
+    assert buffer.add_column() == 1
+    np.testing.assert_array_equal(buffer.line(1), [0, 0, 0, 0])
@@ -0,0 +1,39 @@
+import numpy as np
+
+from Recording import SessionRecorder, SessionReplay
+
+
+def test_landmark_recording_roundtrip(tmp_path):
+    frames = np.random.default_rng(0).random((12, 478, 3))
+    recorder = SessionRecorder(str(tmp_path))
+    for i, frame in enumerate(frames):
+        recorder.record_landmarks(frame, timestamp=10. + i / 30)
+    recorder.close()
+
+    replay = SessionReplay(str(tmp_path))
+    assert replay.has_landmarks
+    assert len(replay) == 12
+    assert isinstance(replay.landmarks, np.memmap)
+    timestamps, replayed = zip(*replay.frames())
+    np.testing.assert_allclose(timestamps, np.arange(12) / 30)
+    np.testing.assert_allclose(np.array(replayed), frames.astype(np.float32))
+
+
+def test_packet_recording_roundtrip(tmp_path):
+    packets = [bytes([i]) * (300 + i) + b"\x00\x00" for i in range(5)]
+    recorder = SessionRecorder(str(tmp_path))
+    for packet in packets:
+        recorder.record_packet(packet)
+    recorder.close()
+
+    replay = SessionReplay(str(tmp_path))
+    assert not replay.has_landmarks
+    assert [frame for _, frame in replay.frames()] == packets
+
+
+def test_recording_without_frames_replays_nothing(tmp_path):
+    SessionRecorder(str(tmp_path)).close()
+
+    replay = SessionReplay(str(tmp_path))
+    assert len(replay) == 0
+    assert list(replay.frames()) == []
@@ -0,0 +1,79 @@
+import cv2
+import numpy as np
+
+import CanonicalFaceModel
+from SignalsCalculator import SignalsCalculater
+
+CAMERA_PARAMETERS = (1000, 1000, 1280 / 2, 720 / 2)
+FRAME_SIZE = (1280, 720)
+
+
+def random_landmarks(seed: int) -> np.ndarray:
+    return 0.3 + 0.4 * np.random.default_rng(seed).random((478, 3))
+
+
+def face_landmarks(frame: int) -> np.ndarray:
+    # canonical face model, turned a little depending on frame and projected with CAMERA_PARAMETERS
+    fx, fy, cx, cy = CAMERA_PARAMETERS
+    camera_matrix = np.array([[fx, 0, cx], [0, fy, cy], [0, 0, 1]], dtype=np.float64)
+    model = CanonicalFaceModel.positions() * (1, -1, -1)
+    points, _ = cv2.projectPoints(model, np.array([0.1 * np.sin(frame), 0.2 * np.cos(frame), 0.05]),
+                                  np.array([1., 2., 60.]), camera_matrix, None)
+    landmarks = np.full((478, 3), 0.5)
+    landmarks[:468, :2] = points[:, 0] / FRAME_SIZE
+    landmarks[:468, 2] = model[:, 2] * fx / 60. / FRAME_SIZE[0]
+    return landmarks
+
+
+def test_process_only_computes_requested_signals():
+    calculator = SignalsCalculater(CAMERA_PARAMETERS, FRAME_SIZE, pose_tracking=True)
+    landmarks = random_landmarks(0)
+    all_signals = calculator.process(landmarks)
+    assert set(all_signals) == set(calculator.signals)
+    frames = calculator.head_pose_calculator.tracking_stats.frames
+
+    signals = calculator.process(landmarks, ["JawOpen", "MouthSmile", "Unknown"])
+    assert set(signals) == {"JawOpen", "MouthSmile"}
+    assert signals["JawOpen"] == all_signals["JawOpen"]
+    assert signals["MouthSmile"] == all_signals["MouthSmile"]
+    # no requested signal needs the head pose
+    assert calculator.head_pose_calculator.tracking_stats.frames == frames
+
+
+def test_pose_is_shared_between_signals():
+    calculator = SignalsCalculater(CAMERA_PARAMETERS, FRAME_SIZE, pose_tracking=True)
+    calculator.process(random_landmarks(1), ["HeadPitch", "HeadYaw", "HeadRoll"])
+    assert calculator.head_pose_calculator.tracking_stats.frames == 1
+
+
+def test_register_signal():
+    calculator = SignalsCalculater(CAMERA_PARAMETERS, FRAME_SIZE)
+    calculator.register_signal("NoseX", (1,), lambda frame: frame.pixels[1, 0])
+    landmarks = random_landmarks(2)
+    assert calculator.process(landmarks, ["NoseX"]) == {"NoseX": landmarks[1, 0] * FRAME_SIZE[0]}
+
+
+def test_process_batch_matches_process():
+    calculator = SignalsCalculater(CAMERA_PARAMETERS, FRAME_SIZE, pose_tracking=True)
+    calculator.register_signal("NoseX", (1,), lambda frame: frame.pixels[1, 0])
+    frames = np.stack([face_landmarks(frame) for frame in range(6)])
+    names = ["HeadYaw", "JawOpen", "MouthSmile", "NoseX", "Unknown"]
+    calculator.process(frames[0], names)
+    rvec = calculator.head_pose_calculator.rvec.copy()
+
+    batch = calculator.process_batch(frames, names, chunk_size=3)
+    assert batch.shape == (6, 4)
+    # the pose tracking of the live frames is left alone
+    assert calculator.head_pose_calculator.tracking_stats.frames == 1
+    np.testing.assert_array_equal(calculator.head_pose_calculator.rvec, rvec)
+    assert calculator.batch_signal_names(names) == ("HeadYaw", "JawOpen", "MouthSmile", "NoseX")
+
+    reference = SignalsCalculater(CAMERA_PARAMETERS, FRAME_SIZE, pose_tracking=True)
+    reference.register_signal("NoseX", (1,), lambda frame: frame.pixels[1, 0])
+    for i, frame in enumerate(frames):
+        if i % 3 == 0:
+            reference.head_pose_calculator.reset_tracking()
+        values = reference.process(frame, names)
+        np.testing.assert_allclose(batch[i], list(values.values()))
+
+    np.testing.assert_array_equal(calculator.process_batch(frames, names, chunk_size=3, processes=2), batch)
@@ -0,0 +1,24 @@
+from Signal import Signal
+from SnapshotMailbox import SnapshotMailbox
+
+
+def test_mailbox_hands_out_the_newest_snapshot_once():
+    notifications = []
+    mailbox = SnapshotMailbox(notify=lambda: notifications.append(mailbox.frame_id))
+    signal = Signal("JawOpen")
+    assert mailbox.take() is None
+
+    for value in (0.2, 0.4, 0.6):
+        signal.scaled_value = value
+        mailbox.publish({"JawOpen": signal}, fps=30.)
+    # a consumer that is behind is only notified once and skips to the newest frame
+    assert notifications == [1]
+    snapshot = mailbox.take()
+    assert (snapshot.frame_id, snapshot.values, snapshot.fps) == (3, {"JawOpen": 0.6}, 30.)
+    assert mailbox.take() is None
+    assert mailbox.latest is snapshot
+
+    signal.scaled_value = 0.8
+    mailbox.publish({"JawOpen": signal})
+    assert notifications == [1, 4]
+    assert mailbox.take().values == {"JawOpen": 0.8}